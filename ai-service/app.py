@@ -1,17 +1,30 @@
 import os
 import json
+import zlib
+import asyncio
 import logging
+import tempfile
 from datetime import datetime
 from typing import Dict, List, Optional
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 from services.llm_service import LLMService
 from services.context_service import ContextService
 from services.session_service import SessionService
+from services.readiness import ReadinessTracker
+from services.warmup import is_warmup_enabled, run_warmup
+from services.prefork import PreforkServer, get_process_memory
+from services.answer_router import Deadline, answer_router
+from services.metrics import RequestMetricsMiddleware, metrics
+from services.tracing import TraceMiddleware, note_trace
+from services.engines import (
+    EngineRegistry, EngineRequest, InstantEngine, RetrievalLLMEngine, TemplateEngine
+)
 
 # Load environment variables
 load_dotenv()
@@ -41,12 +54,16 @@ app.add_middleware(
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(TraceMiddleware)
 
 # Pydantic models
 class ChatRequest(BaseModel):
     message: str
     sessionId: Optional[str] = None
     userIP: Optional[str] = None
+    decoding: Optional[str] = None  # "greedy", "beam" or "sample"; defaults to DECODING_MODE
+    engine: Optional[str] = None  # "instant", "template", "llm" or "cascade"; defaults to the live policy
 
 class ChatResponse(BaseModel):
     response: str
@@ -54,17 +71,41 @@ class ChatResponse(BaseModel):
     confidence: float
     timestamp: str
     sources: Optional[List[str]] = None
+    engine: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    messages: List[str]
+    decoding: Optional[str] = None
+
+class BatchChatResult(BaseModel):
+    index: int
+    response: Optional[str] = None
+    confidence: Optional[float] = None
+    sources: Optional[List[str]] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult]
+    timestamp: str
+
+class EnginePolicyRequest(BaseModel):
+    policy: str
 
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
     model_loaded: bool
     context_loaded: bool
+    ready: bool
+    components: Dict[str, str]
 
 # Global services
 llm_service = None
 context_service = None
 session_service = None
+engines = None
+readiness = ReadinessTracker([])  # Components register as the llm engine starts loading them
+background_tasks = set()
 
 # API Key validation
 async def validate_api_key(x_api_key: str = Header(None)):
@@ -75,32 +116,149 @@ async def validate_api_key(x_api_key: str = Header(None)):
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup"""
-    global llm_service, context_service, session_service
+    """Initialize services on startup.
+    
+    Only the engines used by the startup policy are loaded, and only cheap
+    work happens before traffic is accepted: the llm engine loads portfolio
+    data for the rule-based and lexical paths, while the embedding model
+    and the LLM load in background threads and upgrade the answer paths as
+    each becomes ready. Other engines load on first use.
+    """
+    # Pre-forked workers inherit fully loaded services from the master
+    if engines is not None:
+        _start_background(session_service.run_cleanup())
+        _start_background(session_service.run_flush())
+        _start_background(llm_service.response_cache.run_maintenance())
+        _start_background(metrics.run_snapshots())
+        return
     
     try:
         logger.info("🚀 Starting AI service...")
         
-        # Initialize context service
-        context_service = ContextService()
-        await context_service.load_context()
-        logger.info("✅ Context service initialized")
-        
-        # Initialize LLM service
-        llm_service = LLMService()
-        await llm_service.load_model()
-        logger.info("✅ LLM service initialized")
+        _init_services()
+        _start_background(session_service.run_cleanup())
+        _start_background(session_service.run_flush())
+        _start_background(llm_service.response_cache.run_maintenance())
+        await engines.preload()
         
-        # Initialize session service
-        session_service = SessionService()
-        logger.info("✅ Session service initialized")
-        
-        logger.info("🎉 AI service startup complete")
+        logger.info(f"🎉 AI service accepting traffic (answer policy '{engines.policy}')")
         
     except Exception as e:
         logger.error(f"❌ Startup error: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write pending session changes and cached responses before the process exits"""
+    if session_service is not None:
+        session_service.flush()
+    if llm_service is not None:
+        llm_service.response_cache.flush()
+    if metrics.directory:
+        # The master folds this last snapshot into the retired workers' totals
+        metrics.write_snapshot(metrics.snapshot())
+
+def preload_services():
+    """Load every component synchronously, for pre-fork serving"""
+    # Each worker keeps its own in-memory sessions, so a follow-up landing on
+    # another worker would start over; workers share sessions through SQLite
+    if os.getenv("SESSION_STORE", "memory").lower() != "sqlite":
+        logger.warning("⚠️ Pre-fork workers need a shared session store, using SESSION_STORE=sqlite")
+        os.environ["SESSION_STORE"] = "sqlite"
+    
+    async def _preload():
+        _init_services()
+        # Workers must not share half-loaded models, so load everything up front
+        await _load_context_data()
+        await asyncio.gather(_load_embeddings(), _load_llm())
+        await _warmup()
+        engines.get("llm").mark_loaded()
+        for engine in engines.engines.values():
+            await engine.ensure_loaded()
+    
+    logger.info("🚀 Preloading AI service before forking workers...")
+    asyncio.run(_preload())
+    # Workers open their own connection; SQLite connections must not cross fork()
+    llm_service.response_cache.close()
+
+def _init_services():
+    """Create services and register the answer engines (cheap, nothing is loaded yet)"""
+    global llm_service, context_service, session_service, engines
+    
+    context_service = ContextService()
+    llm_service = LLMService()
+    session_service = SessionService()
+    logger.info("✅ Session service initialized")
+    
+    # Engines get the session with each request; only the LLM engine goes
+    # through the LLM service and its response cache
+    engines = EngineRegistry()
+    engines.register(InstantEngine())
+    engines.register(TemplateEngine())
+    engines.register(RetrievalLLMEngine(context_service, llm_service, loader=_load_retrieval_llm))
+    if not engines.is_valid(engines.policy):
+        logger.warning(f"⚠️ Unknown ANSWER_ENGINE '{engines.policy}', using 'llm'")
+        engines.policy = "llm"
+
+async def _load_retrieval_llm():
+    """Lazy load for the llm engine: portfolio data now, models in the background"""
+    await _load_context_data()
+    
+    # Registered up front so readiness never reports ready between the stages
+    for component in ("embeddings", "llm", "warmup"):
+        readiness.mark_loading(component)
+    embeddings_task = _start_background(_load_embeddings())
+    llm_task = _start_background(_load_llm())
+    _start_background(_warmup(embeddings_task, llm_task))
+
+async def _load_context_data():
+    """Load portfolio data, which is small and enables lexical retrieval immediately"""
+    readiness.mark_loading("context_data")
+    await context_service.load_data()
+    readiness.mark_ready("context_data")
+
+def _start_background(coro):
+    """Run a startup coroutine in the background, keeping a reference to it"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def _load_embeddings():
+    """Load the embedding model and context embeddings"""
+    readiness.mark_loading("embeddings")
+    try:
+        await context_service.load_embeddings()
+        readiness.mark_ready("embeddings")
+    except Exception as e:
+        logger.error(f"❌ Embedding load error: {e}")
+        readiness.mark_failed("embeddings", str(e))
+
+async def _load_llm():
+    """Load the LLM"""
+    readiness.mark_loading("llm")
+    await llm_service.load_model()
+    if llm_service.is_loaded():
+        readiness.mark_ready("llm")
+    else:
+        readiness.mark_failed("llm", "model unavailable, using rule-based responses")
+
+async def _warmup(*load_tasks):
+    """Prime kernels and caches once the models have loaded, before reporting ready"""
+    await asyncio.gather(*load_tasks, return_exceptions=True)
+    
+    if not is_warmup_enabled():
+        readiness.mark_ready("warmup")
+        return
+    
+    readiness.mark_loading("warmup")
+    try:
+        await run_warmup(context_service, llm_service)
+        readiness.mark_ready("warmup")
+    except Exception as e:
+        logger.error(f"❌ Warmup error: {e}")
+        readiness.mark_failed("warmup", str(e))
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -108,65 +266,187 @@ async def health_check():
         status="OK",
         timestamp=datetime.now().isoformat(),
         model_loaded=llm_service is not None and llm_service.is_loaded(),
-        context_loaded=context_service is not None and context_service.is_loaded()
+        context_loaded=context_service is not None and context_service.is_loaded(),
+        ready=readiness.all_ready(),
+        components=readiness.get_status()
     )
 
 @app.post("/chat", response_model=ChatResponse, dependencies=[Depends(validate_api_key)])
-async def chat(request: ChatRequest):
-    """Main chat endpoint"""
+async def chat(request: ChatRequest, x_request_deadline_ms: Optional[int] = Header(None)):
+    """Main chat endpoint.
+    
+    X-Request-Deadline-Ms carries the caller's remaining time budget; answer
+    paths that would not finish within it are skipped. The response's
+    Server-Timing header breaks the time down by stage for X-Trace-Id.
+    """
+    deadline = Deadline.from_header(x_request_deadline_ms)
+    
+    if engines is None:
+        raise HTTPException(status_code=503, detail="Services not initialized")
+    if request.engine and not engines.is_valid(request.engine.lower()):
+        raise HTTPException(status_code=400, detail=f"Unknown answer engine: {request.engine}")
+    
     try:
-        if not llm_service or not context_service:
-            raise HTTPException(status_code=503, detail="Services not initialized")
+        # Get or create session (callers may supply their own session IDs)
+        session_id = request.sessionId
+        session = await session_service.fetch_session(session_id) if session_id else None
+        if session is None:
+            session_id = session_service.create_session(request.userIP, session_id=session_id)
+            session = session_service.get_session(session_id)
         
-        # Get or create session
-        session_id = request.sessionId or session_service.create_session(request.userIP)
-        
-        # Get relevant context
-        relevant_context = await context_service.get_relevant_context(request.message)
-        
-        # Generate response
-        response_data = await llm_service.generate_response(
-            message=request.message,
-            context=relevant_context,
-            session_id=session_id
+        response_data = await engines.answer(
+            EngineRequest(request.message, session, deadline, request.decoding),
+            policy=request.engine
         )
         
+        note_trace("engine", response_data["engine"])
+        
         # Update session
-        session_service.update_session(session_id, request.message, response_data["response"])
+        session_service.update_session(session_id, request.message, response_data["response"], session=session)
+        if "retrieval_memo" in response_data:
+            session_service.set_retrieval_memo(session_id, response_data["retrieval_memo"])
         
-        return ChatResponse(
-            response=response_data["response"],
-            sessionId=session_id,
-            confidence=response_data["confidence"],
-            timestamp=datetime.now().isoformat(),
-            sources=response_data.get("sources", [])
-        )
+        # Serialized here rather than by FastAPI so the stage can be timed
+        with metrics.stage("serialization"):
+            body = ChatResponse(
+                response=response_data["response"],
+                sessionId=session_id,
+                confidence=response_data["confidence"],
+                timestamp=datetime.now().isoformat(),
+                sources=response_data.get("sources", []),
+                engine=response_data["engine"]
+            ).model_dump_json()
+        return Response(body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/chat/batch", response_model=BatchChatResponse, dependencies=[Depends(validate_api_key)])
+async def chat_batch(request: BatchChatRequest):
+    """Answer many independent messages in one call (for offline jobs and evaluation).
+    
+    All queries are embedded and scored together, rule hits are answered
+    without the model, and the remaining generations run in batches. Items
+    do not touch sessions, and a bad item only fails itself.
+    """
+    if engines is None:
+        raise HTTPException(status_code=503, detail="Services not initialized")
+    
+    max_messages = int(os.getenv("MAX_BATCH_MESSAGES", "256"))
+    if len(request.messages) > max_messages:
+        raise HTTPException(status_code=400, detail=f"At most {max_messages} messages per batch")
+    
+    results = [BatchChatResult(index=i) for i in range(len(request.messages))]
+    valid = [i for i, message in enumerate(request.messages) if message.strip()]
+    for i in set(range(len(request.messages))) - set(valid):
+        results[i].error = "Empty message"
+    
+    try:
+        await engines.get("llm").ensure_loaded()
+        messages = [request.messages[i] for i in valid]
+        contexts, intents = await context_service.get_relevant_contexts(messages)
+        responses = await llm_service.generate_responses(messages, contexts, intents, request.decoding)
+    except Exception as e:
+        logger.error(f"Batch chat error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    for i, response_data in zip(valid, responses):
+        results[i].response = response_data["response"]
+        results[i].confidence = response_data["confidence"]
+        results[i].sources = response_data.get("sources", [])
+    
+    return BatchChatResponse(results=results, timestamp=datetime.now().isoformat())
+
 @app.get("/context/reload", dependencies=[Depends(validate_api_key)])
 async def reload_context():
-    """Reload context data"""
+    """Reload context data for every loaded engine"""
+    if engines is None:
+        raise HTTPException(status_code=503, detail="Context service not initialized")
     try:
-        if context_service:
-            await context_service.load_context()
-            return {"message": "Context reloaded successfully"}
-        else:
-            raise HTTPException(status_code=503, detail="Context service not initialized")
+        await engines.reload()
+        return {"message": "Context reloaded successfully"}
     except Exception as e:
         logger.error(f"Context reload error: {e}")
         raise HTTPException(status_code=500, detail="Failed to reload context")
 
+@app.get("/engines", dependencies=[Depends(validate_api_key)])
+async def get_engines():
+    """Get the answer policy and per-engine statistics"""
+    if engines is None:
+        raise HTTPException(status_code=503, detail="Services not initialized")
+    return engines.get_stats()
+
+@app.post("/engines/policy", dependencies=[Depends(validate_api_key)])
+async def set_engine_policy(request: EnginePolicyRequest):
+    """Switch the default answer engine (or "cascade") without a restart"""
+    if engines is None:
+        raise HTTPException(status_code=503, detail="Services not initialized")
+    try:
+        await engines.set_policy(request.policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"policy": engines.policy, "timestamp": datetime.now().isoformat()}
+
+@app.get("/sessions/export", dependencies=[Depends(validate_api_key)])
+async def export_sessions(
+    since: Optional[datetime] = None,
+    min_messages: int = 0,
+    cursor: Optional[str] = None,
+    gzip: bool = False
+):
+    """Stream sessions as NDJSON, one session per line, oldest first.
+    
+    Each line carries a cursor; pass the last one received as ?cursor= to
+    resume an interrupted export. With a durable session store the export
+    covers every worker's sessions.
+    """
+    if session_service is None:
+        raise HTTPException(status_code=503, detail="Session service not initialized")
+    try:
+        after = session_service.parse_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    lines = _export_lines(since.timestamp() if since else None, min_messages, after)
+    if gzip:
+        return StreamingResponse(
+            _gzip_stream(lines),
+            media_type="application/x-ndjson",
+            headers={"Content-Encoding": "gzip"}
+        )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+async def _export_lines(since: Optional[float], min_messages: int, after: Optional[tuple], batch_size: int = 100):
+    """Encode exported sessions in small batches, yielding to requests in between"""
+    batch = []
+    async for cursor, session_data in session_service.iter_sessions(after, since, min_messages, batch_size):
+        session_data["cursor"] = cursor
+        batch.append(json.dumps(session_data, separators=(",", ":")))
+        if len(batch) >= batch_size:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+            await asyncio.sleep(0)
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+async def _gzip_stream(chunks):
+    """Gzip a byte stream incrementally, flushing each chunk so clients see progress"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
 @app.get("/sessions/{session_id}")
 async def get_session(session_id: str, api_key: str = Depends(validate_api_key)):
     """Get session history"""
     try:
-        session = session_service.get_session(session_id)
+        session = await session_service.fetch_session(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
-        return session
+        return session.to_dict()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get session error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -175,17 +455,35 @@ async def get_session(session_id: str, api_key: str = Depends(validate_api_key))
 async def get_stats():
     """Get service statistics"""
     try:
+        sessions = await session_service.get_session_stats()
         return {
             "total_sessions": session_service.get_total_sessions(),
-            "active_sessions": session_service.get_active_sessions(),
-            "total_messages": session_service.get_total_messages(),
+            "active_sessions": sessions["active_sessions"],
+            "total_messages": sessions["total_messages"],
+            "sessions": sessions,
             "model_info": llm_service.get_model_info() if llm_service else None,
-            "context_info": context_service.get_context_info() if context_service else None
+            "context_info": context_service.get_context_info() if context_service else None,
+            "readiness": readiness.get_details(),
+            "router": answer_router.get_stats(),
+            "engines": engines.get_stats() if engines else None,
+            "response_cache": llm_service.response_cache.get_stats() if llm_service else None,
+            "process": get_process_memory()
         }
     except Exception as e:
         logger.error(f"Stats error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: latency histograms by route and stage, answer path and cache counters.
+    
+    Unauthenticated like /health so scrapers need no API key; it exposes
+    only counts and timings. Under pre-fork serving, the answering worker
+    merges in every other worker's latest snapshot.
+    """
+    peer_snapshots = await asyncio.get_running_loop().run_in_executor(None, metrics.read_peer_snapshots)
+    return PlainTextResponse(metrics.render(peer_snapshots), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -196,14 +494,38 @@ async def root():
         "confidential": True
     }
 
+def _limit_torch_threads():
+    """Keep forked workers from oversubscribing cores with torch thread pools"""
+    try:
+        import torch
+        torch.set_num_threads(int(os.getenv("TORCH_THREADS_PER_WORKER", "1")))
+    except ImportError:
+        pass
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
+    workers = int(os.getenv("PREFORK_WORKERS", "1"))
     
-    uvicorn.run(
-        "app:app",
-        host=host,
-        port=port,
-        reload=os.getenv("ENVIRONMENT") == "development",
-        log_level="info"
-    )
+    if workers > 1:
+        preload_services()
+        metrics.share_across_workers(
+            os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), f"ai-service-metrics-{port}")
+        )
+        PreforkServer(
+            app,
+            host=host,
+            port=port,
+            workers=workers,
+            post_fork=_limit_torch_threads,
+            on_worker_exit=metrics.retire_worker,
+            log_level="info"
+        ).run()
+    else:
+        uvicorn.run(
+            "app:app",
+            host=host,
+            port=port,
+            reload=os.getenv("ENVIRONMENT") == "development",
+            log_level="info"
+        )
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark for fast_app's pre-encoded /chat path
+Compares per-request parsing and serialization with the pydantic path it
+replaced, and optionally end-to-end through the ASGI stack. Both apps run
+behind the same tracing and metrics middleware, and fast_app is also timed
+without it, so the middleware's share of the hot path is visible.
+
+Usage: python benchmark_fast_app.py [--iterations N] [--http]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+import fast_app
+from services.instant_responses import get_fast_response
+from services.metrics import RequestMetricsMiddleware
+from services.tracing import TraceMiddleware
+
+SAMPLE_MESSAGES = [
+    "hello",
+    "What are your skills?",
+    "Tell me about his React projects",
+    "How can I contact him?",
+    "What's the weather like?"
+]
+
+# The request/response models the endpoint used before the pre-encoded path
+class ChatRequest(BaseModel):
+    message: str
+    sessionId: Optional[str] = None
+    userIP: Optional[str] = None
+
+class ChatResponse(BaseModel):
+    response: str
+    sessionId: str
+    confidence: float
+    timestamp: str
+    sources: List[str] = []
+
+def validated_path(body: bytes) -> bytes:
+    """Parse with pydantic and serialize like FastAPI's default response handling"""
+    request = ChatRequest.model_validate_json(body)
+    response_text, confidence, sources = get_fast_response(request.message)
+    response = ChatResponse(
+        response=response_text,
+        sessionId=request.sessionId or "fast_0",
+        confidence=confidence,
+        timestamp=datetime.now().isoformat(),
+        sources=sources
+    )
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+def pre_encoded_path(body: bytes) -> bytes:
+    """Parse the raw body and splice into a pre-encoded response"""
+    payload = fast_app.loads(body)
+    return fast_app.build_chat_body(payload["message"], payload.get("sessionId") or "fast_0")
+
+def copy_middleware(target: FastAPI, exclude=()) -> FastAPI:
+    """Give an app fast_app's middleware stack, less the excluded classes"""
+    target.user_middleware = [
+        middleware for middleware in fast_app.app.user_middleware if middleware.cls not in exclude
+    ]
+    return target
+
+def build_validated_app() -> FastAPI:
+    """A copy of fast_app's previous /chat endpoint, behind fast_app's middleware"""
+    legacy = copy_middleware(FastAPI(docs_url=None, redoc_url=None))
+
+    @legacy.post("/chat", response_model=ChatResponse)
+    async def chat(request: ChatRequest, x_api_key: Optional[str] = Header(None)):
+        if x_api_key != fast_app.API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        response_text, confidence, sources = get_fast_response(request.message)
+        return ChatResponse(
+            response=response_text,
+            sessionId=request.sessionId or f"fast_{int(time.time() * 1000)}",
+            confidence=confidence,
+            timestamp=datetime.now().isoformat(),
+            sources=sources
+        )
+
+    return legacy
+
+def build_bare_app() -> FastAPI:
+    """fast_app's /chat endpoint without the tracing and metrics middleware"""
+    bare = copy_middleware(FastAPI(docs_url=None, redoc_url=None), (TraceMiddleware, RequestMetricsMiddleware))
+    bare.post("/chat")(fast_app.chat)
+    return bare
+
+def time_calls(func, bodies: List[bytes], iterations: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(bodies[i % len(bodies)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def check_equivalent(bodies: List[bytes]):
+    """Both paths must produce the same JSON apart from the timestamp"""
+    for body in bodies:
+        old = json.loads(validated_path(body))
+        new = json.loads(pre_encoded_path(body))
+        old.pop("timestamp")
+        new.pop("timestamp")
+        assert old == new, f"Response mismatch for {body!r}: {old} != {new}"
+
+def run_http(bodies: List[bytes], iterations: int):
+    """End-to-end timing through each app's full ASGI stack, called in-process.
+
+    The apps are driven directly rather than through an HTTP client, whose
+    own overhead would swamp the differences being measured.
+    """
+    headers = [(b"x-api-key", fast_app.API_KEY.encode()), (b"content-type", b"application/json")]
+
+    async def call(target, body: bytes):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/chat", "raw_path": b"/chat",
+            "root_path": "", "query_string": b"", "headers": headers,
+            "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000)
+        }
+        status = None
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await target(scope, receive, send)
+        assert status == 200, status
+
+    async def time_app(target) -> float:
+        for body in bodies:
+            await call(target, body)
+        start = time.perf_counter()
+        for i in range(iterations):
+            await call(target, bodies[i % len(bodies)])
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    targets = (
+        ("validated", build_validated_app()),
+        ("pre-encoded", fast_app.app),
+        ("no middleware", build_bare_app())
+    )
+    for name, target in targets:
+        per_request = asyncio.run(time_app(target))
+        print(f"  {name:<14} {per_request:10.1f} µs/request")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fast_app's /chat hot path")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--http", action="store_true", help="Also time full requests through the ASGI app")
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps({"message": message, "sessionId": f"bench_{i}"}).encode("utf-8")
+        for i, message in enumerate(SAMPLE_MESSAGES)
+    ]
+    check_equivalent(bodies)
+
+    print(f"⚡ JSON library: {'orjson' if fast_app.orjson else 'json (install orjson for the fast path)'}")
+    print(f"📊 Parse + serialize, {args.iterations} iterations:")
+    validated = time_calls(validated_path, bodies, args.iterations)
+    pre_encoded = time_calls(pre_encoded_path, bodies, args.iterations)
+    print(f"  {'validated':<12} {validated:10.2f} µs/request")
+    print(f"  {'pre-encoded':<12} {pre_encoded:10.2f} µs/request ({validated / pre_encoded:.1f}x faster)")
+
+    if args.http:
+        print(f"🌐 End-to-end, {args.iterations // 10} requests:")
+        run_http(bodies, args.iterations // 10)
+
+if __name__ == "__main__":
+    main()
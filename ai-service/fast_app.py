@@ -8,11 +8,33 @@ import json
 import os
 import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Tuple
 
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+
+from services.instant_responses import (
+    ANSWER_PATHS, INSTANT_RESPONSES, RESPONSE_VARIANTS, match_fast_response
+)
+from services.metrics import RequestMetricsMiddleware, metrics
+from services.tracing import TraceMiddleware
+
+try:
+    import orjson  # Optional: several times faster than the json module
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    def dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    loads = json.loads
+
+# Read once at import; the hot path never touches the environment
+API_KEY = os.getenv("AI_SERVICE_API_KEY", "dev-key")
+STARTED_AT = time.monotonic()
 
 # Initialize FastAPI app with minimal overhead
 app = FastAPI(
@@ -31,103 +53,36 @@ app.add_middleware(
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(TraceMiddleware)
 
-# Request/Response models
-class ChatRequest(BaseModel):
-    message: str
-    sessionId: Optional[str] = None
-    userIP: Optional[str] = None
-
-class ChatResponse(BaseModel):
-    response: str
-    sessionId: str
-    confidence: float
-    timestamp: str
-    sources: List[str] = []
-
-# Pre-compiled responses for instant delivery
-INSTANT_RESPONSES = {
-    # Greetings
-    "hello": "Hello! I'm Suyash's AI assistant. I can help you learn about his skills, projects, and experience. What would you like to know?",
-    "hi": "Hi there! I'm here to answer questions about Suyash's portfolio. Feel free to ask about his skills, projects, or experience!",
-    "hey": "Hey! I can help you explore Suyash's portfolio. Ask me about his technical skills, projects, or professional background.",
-    
-    # Skills
-    "skills": "Suyash specializes in full-stack development with the MERN stack (MongoDB, Express, React, Node.js). He's also experienced in Python, AI/ML integration, and cloud technologies. Check the Skills section for comprehensive details!",
-    "technologies": "His tech stack includes React, Node.js, Python, MongoDB, JavaScript, TypeScript, AI/ML frameworks, and cloud platforms. He builds scalable, modern web applications.",
-    "programming": "Suyash is proficient in JavaScript, Python, TypeScript, and various frameworks. He focuses on clean, maintainable code and modern development practices.",
-    
-    # Projects
-    "projects": "Suyash has built numerous projects including web applications, AI integrations, and full-stack solutions. Visit the Projects section to see detailed case studies and live demos!",
-    "portfolio": "His portfolio showcases diverse projects from web development to AI implementations. Each project demonstrates different technical skills and problem-solving approaches.",
-    "work": "He's worked on various applications including e-commerce platforms, AI-powered tools, and data visualization dashboards. Check out the Projects section for details!",
-    
-    # Experience
-    "experience": "Suyash has hands-on experience in full-stack development, team leadership, and has been recognized in major hackathons. He's currently pursuing his degree while building real-world applications.",
-    "background": "He combines academic learning with practical development experience. His background includes both individual projects and collaborative team work.",
-    "education": "Currently pursuing his degree while actively developing projects and gaining industry experience through internships and competitions.",
-    
-    # Contact
-    "contact": "You can reach Suyash at suyashmishraa983@gmail.com or use the contact form on this website. He's always open to discussing new opportunities!",
-    "email": "His email is suyashmishraa983@gmail.com. Feel free to reach out for collaborations, opportunities, or just to connect!",
-    "hire": "Suyash is open to new opportunities! Contact him at suyashmishraa983@gmail.com or through the contact form to discuss potential collaborations.",
-    
-    # Specific technologies
-    "react": "Suyash is highly skilled in React, building responsive and interactive user interfaces. He uses modern React patterns, hooks, and state management solutions.",
-    "nodejs": "He's experienced with Node.js for backend development, building RESTful APIs, handling databases, and creating scalable server applications.",
-    "python": "Python is one of his strong suits, especially for AI/ML projects, data analysis, and backend development. He's worked with frameworks like FastAPI and Django.",
-    "ai": "Suyash has extensive experience with AI/ML technologies including TensorFlow, PyTorch, and various AI integrations in web applications.",
-    "mongodb": "He's proficient with MongoDB for database design, optimization, and integration with Node.js applications using Mongoose.",
-    
-    # Default
-    "default": "I'm here to help you learn about Suyash's portfolio! You can ask me about his technical skills, projects, professional experience, or how to contact him. What interests you most?"
-}
+def _encode_body(response: str, confidence: float, sources: List[str]) -> Tuple[bytes, bytes, bytes]:
+    """Pre-encode a response body around the per-request session id and timestamp"""
+    return (
+        b'{"response":' + dumps(response) + b',"sessionId":',
+        b',"confidence":' + dumps(confidence) + b',"timestamp":"',
+        b'","sources":' + dumps(sources) + b'}'
+    )
 
-# Keyword mapping for fast lookup
-KEYWORD_MAP = {
-    # Greetings
-    "hello": "hello", "hi": "hi", "hey": "hey", "greetings": "hello",
-    
-    # Skills
-    "skill": "skills", "skills": "skills", "technology": "technologies", 
-    "technologies": "technologies", "tech": "technologies", "programming": "programming",
-    "development": "skills", "coding": "programming",
-    
-    # Projects
-    "project": "projects", "projects": "projects", "portfolio": "portfolio",
-    "work": "work", "built": "projects", "created": "projects", "application": "projects",
-    
-    # Experience
-    "experience": "experience", "background": "background", "education": "education",
-    "qualification": "background", "career": "experience",
-    
-    # Contact
-    "contact": "contact", "email": "email", "reach": "contact", "hire": "hire",
-    "opportunity": "hire", "connect": "contact",
-    
-    # Technologies
-    "react": "react", "nodejs": "nodejs", "node": "nodejs", "python": "python",
-    "ai": "ai", "ml": "ai", "machine learning": "ai", "artificial intelligence": "ai",
-    "mongodb": "mongodb", "mongo": "mongodb", "database": "mongodb"
+# Every possible body, encoded once at import: (response key, variant) -> parts
+ENCODED_RESPONSES: Dict[Tuple[str, str], Tuple[bytes, bytes, bytes]] = {
+    (key, variant): _encode_body(text, confidence, sources)
+    for key, text in INSTANT_RESPONSES.items()
+    for variant, (confidence, sources) in RESPONSE_VARIANTS.items()
 }
 
-def get_fast_response(message: str) -> tuple[str, float, List[str]]:
-    """Get instant response using pre-compiled responses"""
-    message_lower = message.lower().strip()
-    
-    # Direct lookup for exact matches
-    if message_lower in INSTANT_RESPONSES:
-        return INSTANT_RESPONSES[message_lower], 0.95, ["Fast Response"]
-    
-    # Keyword-based lookup
-    for keyword, response_key in KEYWORD_MAP.items():
-        if keyword in message_lower:
-            response = INSTANT_RESPONSES.get(response_key, INSTANT_RESPONSES["default"])
-            confidence = 0.9 if response_key != "default" else 0.7
-            return response, confidence, ["Portfolio Data"]
-    
-    # Default response
-    return INSTANT_RESPONSES["default"], 0.7, ["AI Assistant"]
+def build_chat_body(message: str, session_id: str) -> bytes:
+    """Match a message and build its response body"""
+    return encode_chat_body(match_fast_response(message), session_id)
+
+def encode_chat_body(match: Tuple[str, str], session_id: str) -> bytes:
+    """Splice the session id and timestamp into a pre-encoded response body"""
+    head, middle, tail = ENCODED_RESPONSES[match]
+    # isoformat() output needs no JSON escaping
+    return head + dumps(session_id) + middle + datetime.now().isoformat().encode("ascii") + tail
+
+def _error(status_code: int, detail: str) -> Response:
+    return Response(dumps({"detail": detail}), status_code=status_code, media_type="application/json")
 
 @app.get("/")
 async def root():
@@ -149,46 +104,58 @@ async def health_check():
         "response_time": "instant"
     }
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(
-    request: ChatRequest,
-    x_api_key: Optional[str] = Header(None)
-):
-    """Ultra-fast chat endpoint"""
+@app.post("/chat")
+async def chat(request: Request):
+    """Ultra-fast chat endpoint.
+    
+    Skips pydantic validation and FastAPI's response encoding: the body is
+    parsed directly and the answer is a pre-encoded response with only the
+    session id and timestamp spliced in.
+    """
     # Simple API key validation
-    expected_key = os.getenv("AI_SERVICE_API_KEY", "dev-key")
-    if x_api_key != expected_key:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+    if request.headers.get("x-api-key") != API_KEY:
+        return _error(401, "Invalid API key")
     
     try:
-        # Generate session ID if not provided
-        session_id = request.sessionId or f"fast_{int(time.time() * 1000)}"
-        
-        # Get instant response
-        response_text, confidence, sources = get_fast_response(request.message)
+        payload = loads(await request.body())
+        message = payload["message"]
+        session_id = payload.get("sessionId")
+        if not isinstance(message, str) or not isinstance(session_id, (str, type(None))):
+            raise TypeError
+    except Exception:
+        return _error(422, "Body must be a JSON object with a string 'message'")
+    
+    try:
+        with metrics.stage("rules"):
+            match = match_fast_response(message)
+        metrics.increment("ai_answers_total", path=ANSWER_PATHS[match[1]])
         
-        return ChatResponse(
-            response=response_text,
-            sessionId=session_id,
-            confidence=confidence,
-            timestamp=datetime.now().isoformat(),
-            sources=sources
-        )
+        # Generate session ID if not provided
+        with metrics.stage("serialization"):
+            body = encode_chat_body(match, session_id or f"fast_{int(time.time() * 1000)}")
+        return Response(body, media_type="application/json")
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        return _error(500, f"Error: {str(e)}")
 
 @app.get("/stats")
 async def get_stats():
-    """Get service statistics"""
+    """Get service statistics (measured in this process)"""
+    chat_latency = metrics.histograms.get(("ai_request_duration_seconds", (("route", "/chat"),)))
     return {
         "service": "fast-portfolio-ai",
         "total_responses": len(INSTANT_RESPONSES),
-        "average_response_time": "< 50ms",
-        "uptime": "100%",
+        "chat_requests": chat_latency.count if chat_latency else 0,
+        "average_response_time_ms": round(chat_latency.mean() * 1000, 3) if chat_latency else None,
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 1),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: request and stage latency histograms, answer counters"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     
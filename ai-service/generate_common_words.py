@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Regenerate the intent matcher's COMMON_WORDS lexicon
+Finds the words among the most frequent in English that typo correction
+would otherwise rewrite into a keyword, and writes them (with the keyword
+vocabulary's fingerprint) into services/intent_matcher.py. Rerun it after
+changing PORTFOLIO_INTENTS or the correction length limits.
+
+Usage: pip install wordfreq && python generate_common_words.py [--top N] [--check]
+"""
+
+import argparse
+import os
+import re
+import sys
+import textwrap
+from typing import FrozenSet
+
+from services import intent_matcher as matcher_module
+from services.intent_matcher import PORTFOLIO_INTENTS, IntentMatcher, vocabulary_fingerprint
+
+MATCHER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "services", "intent_matcher.py")
+TOP_WORDS = 30000
+
+def find_common_words(top: int = TOP_WORDS) -> FrozenSet[str]:
+    """Frequent English words that the matcher would correct into a keyword"""
+    try:
+        from wordfreq import top_n_list
+    except ImportError:
+        sys.exit("❌ wordfreq is required: pip install wordfreq")
+
+    # Without a lexicon, so every word correction can reach is considered
+    matcher = IntentMatcher(PORTFOLIO_INTENTS, common_words=frozenset())
+    vocabulary = matcher.vocabulary
+    words = set()
+    for word in top_n_list("en", top):
+        if matcher.TOKEN_PATTERN.fullmatch(word) is None or word in vocabulary:
+            continue
+        # Plurals of keywords are folded before correction is tried
+        if len(word) > 3 and word.endswith("s") and word[:-1] in vocabulary:
+            continue
+        if matcher.correct(word) != word:
+            words.add(word)
+    return frozenset(words)
+
+def render(words: FrozenSet[str], fingerprint: str) -> str:
+    """The fingerprint and COMMON_WORDS assignments as they appear in the module"""
+    body = textwrap.fill(
+        ", ".join(f'"{word}"' for word in sorted(words)),
+        width=76, initial_indent="    ", subsequent_indent="    ", break_on_hyphens=False
+    )
+    return f'COMMON_WORDS_FINGERPRINT = "{fingerprint}"\nCOMMON_WORDS = frozenset({{\n{body}\n}})'
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the intent matcher's COMMON_WORDS lexicon")
+    parser.add_argument("--top", type=int, default=TOP_WORDS, help="How many of the most frequent words to consider")
+    parser.add_argument("--check", action="store_true", help="Only report whether the lexicon is up to date")
+    args = parser.parse_args()
+
+    words = find_common_words(args.top)
+    fingerprint = vocabulary_fingerprint(PORTFOLIO_INTENTS)
+    current = (matcher_module.COMMON_WORDS, matcher_module.COMMON_WORDS_FINGERPRINT)
+    if current == (words, fingerprint):
+        print(f"✅ COMMON_WORDS is up to date ({len(words)} words)")
+        return
+
+    added, removed = sorted(words - current[0]), sorted(current[0] - words)
+    print(f"📝 COMMON_WORDS: {len(words)} words, +{len(added)} {added}, -{len(removed)} {removed}")
+    if args.check:
+        sys.exit(1)
+
+    with open(MATCHER_PATH, "r") as f:
+        source = f.read()
+    source, count = re.subn(
+        r'COMMON_WORDS_FINGERPRINT = "[0-9a-f]*"\nCOMMON_WORDS = frozenset\(\{.*?\n\}\)',
+        lambda _: render(words, fingerprint),
+        source,
+        flags=re.DOTALL
+    )
+    if count != 1:
+        sys.exit(f"❌ Could not find the COMMON_WORDS block in {MATCHER_PATH}")
+    with open(MATCHER_PATH, "w") as f:
+        f.write(source)
+    print(f"✅ Wrote {MATCHER_PATH}")
+
+if __name__ == "__main__":
+    main()
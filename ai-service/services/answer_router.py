@@ -0,0 +1,162 @@
+import os
+import math
+import time
+from typing import Dict, Optional
+
+class Deadline:
+    """Per-request time budget measured on the monotonic clock"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = max(0.0, budget_seconds)
+        self.expires_at = time.monotonic() + self.budget
+
+    @classmethod
+    def from_header(cls, budget_ms: Optional[int]) -> "Deadline":
+        """Build a deadline from the caller's remaining budget in milliseconds.
+
+        Callers send a relative budget rather than an absolute timestamp so
+        clock skew between hosts does not matter.
+        """
+        default_ms = int(os.getenv("DEFAULT_REQUEST_BUDGET_MS", "7000"))
+        max_ms = int(os.getenv("MAX_REQUEST_BUDGET_MS", "30000"))
+        if budget_ms is None or budget_ms <= 0:
+            budget_ms = default_ms
+        return cls(min(budget_ms, max_ms) / 1000.0)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Check if the deadline has passed"""
+        return time.monotonic() >= self.expires_at
+
+    def bucket(self) -> int:
+        """Power-of-two bucket of the time left (..., 0.5-1s, 1-2s, 2-4s, ...), floored at 1/8s"""
+        return math.floor(math.log2(max(self.remaining(), 0.125)))
+
+class LatencyEstimator:
+    """Exponentially weighted latency estimate for one answer path.
+
+    Tracks the mean and mean absolute deviation, and estimates a pessimistic
+    latency as mean + k * deviation so routing decisions hold for most
+    requests rather than the average one.
+
+    A skipped path produces no samples, so without help a single slow spell
+    would keep it skipped forever: while a path is being skipped its
+    estimate halves every half_life seconds until it is tried again. The
+    decay depends on time only, not on how many requests skipped the path.
+    """
+
+    def __init__(
+        self,
+        initial_seconds: float,
+        alpha: float = 0.2,
+        k: float = 2.0,
+        half_life: Optional[float] = None
+    ):
+        self.mean = initial_seconds
+        self.deviation = initial_seconds / 2
+        self.alpha = alpha
+        self.k = k
+        self.half_life = half_life if half_life is not None else float(
+            os.getenv("LATENCY_DECAY_HALF_LIFE_S", "30")
+        )
+        self.samples = 0
+        self.skipped_since: Optional[float] = None
+
+    def record(self, seconds: float, censored: bool = False):
+        """Record an observed latency.
+
+        A censored sample (the attempt timed out) only shows the path takes at
+        least that long, so it counts as no faster than the current estimate.
+        """
+        if censored:
+            seconds = max(seconds, self.estimate())
+
+        # Start from the decayed estimate that let the path be tried again
+        decay = self._decay()
+        self.mean *= decay
+        self.deviation *= decay
+        self.skipped_since = None
+
+        error = seconds - self.mean
+        self.mean += self.alpha * error
+        self.deviation += self.alpha * (abs(error) - self.deviation)
+        self.samples += 1
+
+    def skip(self):
+        """Note that the path was skipped; the estimate decays until the next sample"""
+        if self.skipped_since is None:
+            self.skipped_since = time.monotonic()
+
+    def _decay(self) -> float:
+        if self.skipped_since is None or self.half_life <= 0:
+            return 1.0
+        return 0.5 ** ((time.monotonic() - self.skipped_since) / self.half_life)
+
+    def estimate(self) -> float:
+        """Pessimistic latency estimate in seconds"""
+        return (self.mean + self.k * self.deviation) * self._decay()
+
+class AnswerRouter:
+    """Chooses which answer paths fit in a request's remaining budget.
+
+    Paths are tried in their usual order (cache, rules, LLM, fallback) but an
+    expensive path is only started when its live latency estimate fits in
+    what is left of the deadline, and its timeout is derived from that same
+    deadline. A safety margin is kept for the cheap fallback and response
+    serialization so the service always answers before the caller gives up.
+    """
+
+    # Priors used until live samples arrive
+    DEFAULT_ESTIMATES = {
+        "rules": 0.001,
+        "retrieval": 0.15,
+        "llm": 2.5
+    }
+
+    def __init__(self, safety_margin: Optional[float] = None):
+        self.safety_margin = safety_margin if safety_margin is not None else float(
+            os.getenv("DEADLINE_SAFETY_MARGIN_MS", "150")
+        ) / 1000.0
+        self.estimators = {
+            path: LatencyEstimator(seconds)
+            for path, seconds in self.DEFAULT_ESTIMATES.items()
+        }
+        self.skipped = {path: 0 for path in self.DEFAULT_ESTIMATES}
+
+    def budget_for(self, deadline: Deadline) -> float:
+        """Seconds a path may use while leaving the safety margin"""
+        return max(0.0, deadline.remaining() - self.safety_margin)
+
+    def can_afford(self, path: str, deadline: Deadline) -> bool:
+        """Check if a path is expected to finish within the remaining budget"""
+        fits = self.estimators[path].estimate() <= self.budget_for(deadline)
+        if not fits:
+            self.skipped[path] += 1
+            self.estimators[path].skip()
+        return fits
+
+    def timeout_for(self, path: str, deadline: Deadline) -> float:
+        """Timeout for a path that has been started under a deadline"""
+        return self.budget_for(deadline)
+
+    def record(self, path: str, seconds: float, timed_out: bool = False):
+        """Record how long a path took; a timeout is a lower bound, not a sample"""
+        self.estimators[path].record(seconds, censored=timed_out)
+
+    def get_stats(self) -> Dict:
+        """Get live latency estimates per path"""
+        return {
+            path: {
+                "mean_ms": round(estimator.mean * 1000, 2),
+                "estimate_ms": round(estimator.estimate() * 1000, 2),
+                "samples": estimator.samples,
+                "skipped": self.skipped[path]
+            }
+            for path, estimator in self.estimators.items()
+        }
+
+# Shared by ContextService and LLMService so both see the same estimates
+answer_router = AnswerRouter()
@@ -0,0 +1,116 @@
+import os
+import time
+import random
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Circuit breaker for a slow or failing dependency.
+
+    closed:    calls go through; outcomes are recorded in a rolling window and
+               the breaker opens once the failure rate crosses the threshold.
+    open:      calls are rejected for the cooldown window.
+    half_open: a small fraction of calls are let through as probes; enough
+               consecutive successes close the breaker, any failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[float] = None,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        cooldown_seconds: Optional[float] = None,
+        probe_fraction: Optional[float] = None,
+        probes_to_close: Optional[int] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold if failure_threshold is not None else float(os.getenv("BREAKER_FAILURE_THRESHOLD", "0.5"))
+        self.window_size = window_size if window_size is not None else int(os.getenv("BREAKER_WINDOW_SIZE", "20"))
+        self.min_calls = min_calls if min_calls is not None else int(os.getenv("BREAKER_MIN_CALLS", "5"))
+        self.cooldown_seconds = cooldown_seconds if cooldown_seconds is not None else float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+        self.probe_fraction = probe_fraction if probe_fraction is not None else float(os.getenv("BREAKER_PROBE_FRACTION", "0.1"))
+        self.probes_to_close = probes_to_close if probes_to_close is not None else int(os.getenv("BREAKER_PROBES_TO_CLOSE", "3"))
+
+        self.state = self.CLOSED
+        self.outcomes = deque(maxlen=self.window_size)  # True for failure
+        self.opened_at = 0.0
+        self.probe_successes = 0
+        self.rejected = 0
+        self.transitions = deque(maxlen=20)
+
+    def allow_request(self) -> bool:
+        """Check if a call may go through"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown_seconds:
+                self.rejected += 1
+                return False
+            self._transition(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN and random.random() >= self.probe_fraction:
+            self.rejected += 1
+            return False
+
+        return True
+
+    def record_success(self):
+        """Record a successful call"""
+        if self.state == self.HALF_OPEN:
+            self.probe_successes += 1
+            if self.probe_successes >= self.probes_to_close:
+                self._transition(self.CLOSED)
+            return
+
+        self.outcomes.append(False)
+
+    def record_failure(self):
+        """Record a failed or timed out call"""
+        if self.state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+            return
+
+        self.outcomes.append(True)
+        if self.state == self.CLOSED and len(self.outcomes) >= self.min_calls:
+            if self.failure_rate() >= self.failure_threshold:
+                self._transition(self.OPEN)
+
+    def failure_rate(self) -> float:
+        """Failure rate over the rolling window"""
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and recent transitions"""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 3),
+            "window_calls": len(self.outcomes),
+            "rejected": self.rejected,
+            "transitions": list(self.transitions)
+        }
+
+    def _transition(self, state: str):
+        previous = self.state
+        self.state = state
+
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+        elif state == self.HALF_OPEN:
+            self.probe_successes = 0
+        elif state == self.CLOSED:
+            self.outcomes.clear()
+
+        self.transitions.append({
+            "from": previous,
+            "to": state,
+            "timestamp": datetime.now().isoformat()
+        })
+        logger.warning(f"⚡ Circuit breaker '{self.name}': {previous} -> {state}")
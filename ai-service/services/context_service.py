@@ -1,15 +1,42 @@
 import os
+import re
 import json
+import hashlib
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-from functools import lru_cache
 import asyncio
+import time
+
+from services.answer_router import Deadline, answer_router
+from services.intent_classifier import IntentClassifier
+from services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Words that make a message refer back to the previous turn
+FOLLOWUP_MARKERS = frozenset({
+    "it", "its", "that", "this", "these", "those", "they", "them", "their",
+    "there", "he", "him", "his", "she", "her", "more", "else", "also", "same"
+})
+
+# Words that carry no topic of their own
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "so", "ok", "okay", "please", "what", "how",
+    "why", "when", "where", "which", "who", "is", "are", "was", "were", "do",
+    "does", "did", "can", "could", "would", "tell", "me", "us", "you", "about",
+    "any", "anything", "other", "explain", "elaborate", "details", "detail",
+    "further", "on", "of", "in", "with", "to", "go"
+})
+
+class RetrievalMemo(NamedTuple):
+    """A session's last retrieval, reused and blended on follow-up turns"""
+    version: int  # ContextService.context_version the results belong to
+    query_embedding: np.ndarray
+    results: Tuple[Tuple[str, float], ...]  # (item id, similarity)
+
 class ContextService:
     def __init__(self):
         self.context_data = []
@@ -18,32 +45,98 @@ class ContextService:
         self.model_name = "all-MiniLM-L6-v2"  # Lightweight sentence transformer
         self.query_cache = {}  # Cache for query embeddings
         self.similarity_cache = {}  # Cache for similarity results
+        self.embeddings_loading = False
+        self.intent_classifier = IntentClassifier()
         
+        # Bumped whenever context items change, invalidating session memos
+        self.context_version = 0
+        self.item_index = {}  # Item id -> position in context_data
+        self.followup_reuse_similarity = float(os.getenv("FOLLOWUP_REUSE_SIMILARITY", "0.9"))
+        self.followup_blend_weight = float(os.getenv("FOLLOWUP_BLEND_WEIGHT", "0.35"))
+        self.followup_stats = {"reused": 0, "reused_without_encode": 0, "blended": 0, "fresh": 0}
+    
     async def load_context(self):
         """Load context data and create embeddings"""
         try:
             logger.info("Loading context data...")
             
+            if self.embedding_model is None:
+                await self.load_data()
+                # A background load in progress picks up the new data itself
+                if not self.embeddings_loading:
+                    await self.load_embeddings()
+                return
+            
+            # Reload: embed the new data before swapping so readers never see
+            # context items without matching embeddings
+            context_data = self._read_portfolio_data()
+            embeddings = await asyncio.get_event_loop().run_in_executor(
+                None, self._encode_context, context_data
+            )
+            self._swap_context(context_data, embeddings)
+            logger.info(f"✅ Context reloaded: {len(context_data)} items")
+        
+        except Exception as e:
+            logger.error(f"❌ Failed to load context: {e}")
+            raise
+    
+    async def load_data(self):
+        """Load portfolio data for lexical retrieval (fast, no model needed)"""
+        context_data = self._read_portfolio_data()
+        self._swap_context(context_data, None)
+        
+        if context_data:
+            logger.info(f"✅ Context data loaded: {len(context_data)} items (lexical)")
+        else:
+            logger.warning("⚠️ No context data found")
+    
+    async def load_embeddings(self):
+        """Load the embedding model and embed the current context in a worker thread"""
+        loop = asyncio.get_event_loop()
+        self.embeddings_loading = True
+        
+        try:
             # Load embedding model
-            self.embedding_model = SentenceTransformer(self.model_name)
+            self.embedding_model = await loop.run_in_executor(
+                None, SentenceTransformer, self.model_name
+            )
             logger.info(f"✅ Embedding model loaded: {self.model_name}")
             
-            # Load context from files
-            await self._load_portfolio_data()
+            # Train the intent classifier on the shipped examples
+            try:
+                await loop.run_in_executor(None, self.intent_classifier.train, self.embedding_model)
+            except Exception as e:
+                logger.warning(f"⚠️ Intent classifier unavailable: {e}")
             
             # Create embeddings
-            if self.context_data:
-                await self._create_embeddings()
-                logger.info(f"✅ Context loaded: {len(self.context_data)} items")
-            else:
-                logger.warning("⚠️ No context data found")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to load context: {e}")
-            raise
+            context_data = self.context_data
+            while context_data:
+                embeddings = await loop.run_in_executor(None, self._encode_context, context_data)
+                if context_data is self.context_data:
+                    self._swap_context(context_data, embeddings)
+                    logger.info(f"✅ Context loaded: {len(context_data)} items")
+                    break
+                # Data was reloaded while encoding; embed the fresh snapshot
+                context_data = self.context_data
+        finally:
+            self.embeddings_loading = False
+    
+    def _swap_context(self, context_data: List[Dict], embeddings: Optional[np.ndarray]):
+        """Replace context data and embeddings together and drop stale caches"""
+        self.context_data = context_data
+        self.embeddings = embeddings
+        self.similarity_cache = {}
+        self._reindex()
     
-    async def _load_portfolio_data(self):
+    def _reindex(self):
+        """Rebuild the item id index and invalidate memos of the previous items"""
+        self.item_index = {item["id"]: idx for idx, item in enumerate(self.context_data)}
+        self.context_version += 1
+    
+    def _read_portfolio_data(self) -> List[Dict]:
         """Load portfolio data from various sources"""
+        context_data = []
+        
         # Load from data directory
         data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
         
@@ -52,34 +145,53 @@ class ContextService:
         if os.path.exists(skills_file):
             with open(skills_file, 'r') as f:
                 skills_data = json.load(f)
-                self._process_skills_data(skills_data)
+                self._process_skills_data(context_data, skills_data)
         
         # Load projects data
         projects_file = os.path.join(data_dir, "projects.json")
         if os.path.exists(projects_file):
             with open(projects_file, 'r') as f:
                 projects_data = json.load(f)
-                self._process_projects_data(projects_data)
+                self._process_projects_data(context_data, projects_data)
         
         # Load experience data
         experience_file = os.path.join(data_dir, "experience.json")
         if os.path.exists(experience_file):
             with open(experience_file, 'r') as f:
                 experience_data = json.load(f)
-                self._process_experience_data(experience_data)
+                self._process_experience_data(context_data, experience_data)
         
         # Load general info
         info_file = os.path.join(data_dir, "general_info.json")
         if os.path.exists(info_file):
             with open(info_file, 'r') as f:
                 info_data = json.load(f)
-                self._process_general_info(info_data)
+                self._process_general_info(context_data, info_data)
         
         # Add default context if no files found
-        if not self.context_data:
-            self._add_default_context()
+        if not context_data:
+            self._add_default_context(context_data)
+        
+        for item in context_data:
+            self._prepare_item(item)
+        
+        return context_data
+    
+    def _prepare_item(self, item: Dict):
+        """Precompute per-item features so requests never re-process content strings"""
+        content = item.get("content", "")
+        item["id"] = self._item_id(item)
+        item["content_lower"] = content.lower()
+        item["tokens"] = frozenset(item["content_lower"].split())
+        item["summary"] = content[:200] + "..."
+    
+    @staticmethod
+    def _item_id(item: Dict) -> str:
+        """Content-derived id, stable across processes and restarts"""
+        key = f"{item.get('type', '')}\x00{item.get('content', '')}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
     
-    def _process_skills_data(self, skills_data: Dict):
+    def _process_skills_data(self, context_data: List[Dict], skills_data: Dict):
         """Process skills data into context items"""
         for category, skills in skills_data.get("technical", {}).items():
             content = f"Technical skills in {category}: " + ", ".join([
@@ -87,7 +199,7 @@ class ContextService:
                 for skill in skills
             ])
             
-            self.context_data.append({
+            context_data.append({
                 "content": content,
                 "type": "skills",
                 "category": category,
@@ -98,14 +210,14 @@ class ContextService:
         soft_skills = skills_data.get("soft", [])
         if soft_skills:
             content = f"Soft skills: {', '.join(soft_skills)}"
-            self.context_data.append({
+            context_data.append({
                 "content": content,
                 "type": "skills",
                 "category": "soft",
                 "source": "Skills Section"
             })
     
-    def _process_projects_data(self, projects_data: List[Dict]):
+    def _process_projects_data(self, context_data: List[Dict], projects_data: List[Dict]):
         """Process projects data into context items"""
         for project in projects_data:
             # Main project description
@@ -121,7 +233,7 @@ class ContextService:
             if project.get('solutions'):
                 content += f"Solutions: {'. '.join(project['solutions'])}. "
             
-            self.context_data.append({
+            context_data.append({
                 "content": content,
                 "type": "project",
                 "title": project.get('title', ''),
@@ -129,7 +241,7 @@ class ContextService:
                 "source": "Projects Section"
             })
     
-    def _process_experience_data(self, experience_data: List[Dict]):
+    def _process_experience_data(self, context_data: List[Dict], experience_data: List[Dict]):
         """Process experience data into context items"""
         for exp in experience_data:
             content = f"Experience at {exp.get('company', '')}: "
@@ -142,7 +254,7 @@ class ContextService:
             if exp.get('technologies'):
                 content += f"Technologies used: {', '.join(exp['technologies'])}. "
             
-            self.context_data.append({
+            context_data.append({
                 "content": content,
                 "type": "experience",
                 "company": exp.get('company', ''),
@@ -150,25 +262,25 @@ class ContextService:
                 "source": "Resume Section"
             })
     
-    def _process_general_info(self, info_data: Dict):
+    def _process_general_info(self, context_data: List[Dict], info_data: Dict):
         """Process general information into context items"""
         for key, value in info_data.items():
             if isinstance(value, str):
-                self.context_data.append({
+                context_data.append({
                     "content": f"{key}: {value}",
                     "type": "general",
                     "category": key,
                     "source": "General Information"
                 })
             elif isinstance(value, list):
-                self.context_data.append({
+                context_data.append({
                     "content": f"{key}: {', '.join(value)}",
                     "type": "general",
                     "category": key,
                     "source": "General Information"
                 })
     
-    def _add_default_context(self):
+    def _add_default_context(self, context_data: List[Dict]):
         """Add default context when no data files are found"""
         default_context = [
             {
@@ -191,19 +303,19 @@ class ContextService:
             }
         ]
         
-        self.context_data.extend(default_context)
+        context_data.extend(default_context)
     
-    async def _create_embeddings(self):
+    def _encode_context(self, context_data: List[Dict]) -> np.ndarray:
         """Create embeddings for all context items"""
         try:
-            texts = [item["content"] for item in self.context_data]
-            self.embeddings = self.embedding_model.encode(texts)
+            texts = [item["content"] for item in context_data]
+            embeddings = self.embedding_model.encode(texts)
             logger.info(f"✅ Created embeddings for {len(texts)} context items")
+            return embeddings
         except Exception as e:
             logger.error(f"❌ Failed to create embeddings: {e}")
             raise
     
-    @lru_cache(maxsize=50)
     def _get_cached_query_embedding(self, query: str) -> Optional[np.ndarray]:
         """Get cached query embedding"""
         return self.query_cache.get(query)
@@ -217,66 +329,294 @@ class ContextService:
             keys_to_remove = list(self.query_cache.keys())[:25]
             for key in keys_to_remove:
                 del self.query_cache[key]
-
-    async def get_relevant_context(self, query: str, top_k: int = 3) -> List[Dict]:
+    
+    async def get_relevant_context(
+        self,
+        query: str,
+        top_k: int = 3,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
         """Get relevant context for a query with caching and optimizations"""
-        try:
-            if not self.embeddings or not self.context_data:
+        with metrics.stage("retrieval"):
+            try:
+                # Pin the current snapshot so a concurrent reload cannot mix versions
+                context_data, embeddings = self.context_data, self.embeddings
+                
+                # Serve lexical matches until the embedding model is ready
+                if embeddings is None or not context_data:
+                    return self._get_fallback_context(query)
+                
+                # Check similarity cache first
+                cache_key = f"{query}_{top_k}"
+                if cache_key in self.similarity_cache:
+                    metrics.increment("ai_cache_requests_total", cache="similarity", result="hit")
+                    logger.info("Returning cached similarity results")
+                    return self.similarity_cache[cache_key]
+                metrics.increment("ai_cache_requests_total", cache="similarity", result="miss")
+                
+                # Use lexical matching when embedding retrieval would not fit the budget
+                deadline = deadline or Deadline.from_header(None)
+                if not answer_router.can_afford("retrieval", deadline):
+                    logger.info("Skipping embedding retrieval, not enough time left")
+                    return self._get_fallback_context(query)
+                
+                start_time = time.perf_counter()
+                timed_out = False
+                try:
+                    similarities = await asyncio.wait_for(
+                        self._score_query(query, embeddings),
+                        timeout=answer_router.timeout_for("retrieval", deadline)
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    raise
+                finally:
+                    answer_router.record("retrieval", time.perf_counter() - start_time, timed_out)
+                
+                relevant_context = self._top_context(context_data, similarities, top_k)
+                
+                # Cache the result
+                self.similarity_cache[cache_key] = relevant_context
+                if len(self.similarity_cache) > 200:
+                    # Remove oldest entries
+                    keys_to_remove = list(self.similarity_cache.keys())[:50]
+                    for key in keys_to_remove:
+                        del self.similarity_cache[key]
+                
+                return relevant_context
+            
+            except asyncio.TimeoutError:
+                logger.warning("Context similarity calculation timed out, using fallback")
+                return self._get_fallback_context(query)
+            except Exception as e:
+                logger.error(f"Error getting relevant context: {e}")
                 return self._get_fallback_context(query)
+    
+    async def get_relevant_contexts(
+        self,
+        queries: List[str],
+        top_k: int = 3
+    ) -> Tuple[List[List[Dict]], List[Optional[Dict]]]:
+        """Get relevant context and intent for many queries at once.
+        
+        Queries without a cached embedding are encoded in a single encode()
+        call, and all of them are scored with one matrix-matrix product
+        against the context embeddings. Intents are classified from those
+        same embeddings; they are not added to the query cache, which is
+        sized for live traffic, so a large batch neither loses its own
+        embeddings before classification nor evicts those of /chat requests.
+        """
+        context_data, embeddings = self.context_data, self.embeddings
+        if embeddings is None or not context_data or not queries:
+            return [self._get_fallback_context(query) for query in queries], [None] * len(queries)
+        
+        try:
+            loop = asyncio.get_event_loop()
             
-            # Check similarity cache first
-            cache_key = f"{query}_{top_k}"
-            if cache_key in self.similarity_cache:
-                logger.info("Returning cached similarity results")
-                return self.similarity_cache[cache_key]
+            query_embeddings = {}
+            for query in queries:
+                cached = self._get_cached_query_embedding(query)
+                if cached is not None:
+                    query_embeddings[query] = cached
             
-            # Get or create query embedding
-            query_embedding = self._get_cached_query_embedding(query)
-            if query_embedding is None:
-                # Run embedding in executor to avoid blocking
-                query_embedding = await asyncio.get_event_loop().run_in_executor(
-                    None, 
-                    lambda: self.embedding_model.encode([query])
-                )
-                self._cache_query_embedding(query, query_embedding)
-            else:
-                query_embedding = np.array([query_embedding])
+            missing = [query for query in dict.fromkeys(queries) if query not in query_embeddings]
+            if missing:
+                with metrics.stage("embedding"):
+                    encoded = await loop.run_in_executor(None, lambda: self.embedding_model.encode(missing))
+                for query, query_embedding in zip(missing, encoded):
+                    query_embeddings[query] = query_embedding.reshape(1, -1)
             
-            # Calculate similarities with timeout
-            similarities = await asyncio.wait_for(
-                asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: cosine_similarity(query_embedding, self.embeddings)[0]
-                ),
-                timeout=2.0  # 2 second timeout for similarity calculation
+            query_matrix = np.vstack([query_embeddings[query] for query in queries])
+            with metrics.stage("similarity"):
+                similarities = await loop.run_in_executor(
+                    None, lambda: cosine_similarity(query_matrix, embeddings)
+                )
+        except Exception as e:
+            logger.error(f"Error getting batch context: {e}")
+            return [self._get_fallback_context(query) for query in queries], [None] * len(queries)
+        
+        contexts, intents = [], []
+        for i, (query, row) in enumerate(zip(queries, similarities)):
+            # A bad item only loses its own context and intent
+            try:
+                contexts.append(self._top_context(context_data, row, top_k))
+            except Exception as e:
+                logger.error(f"Batch item {i} context error: {e}")
+                contexts.append(self._get_fallback_context(query))
+            try:
+                intents.append(self.intent_classifier.classify(query_embeddings[query]))
+            except Exception as e:
+                logger.error(f"Batch item {i} intent error: {e}")
+                intents.append(None)
+        return contexts, intents
+    
+    async def get_session_context(
+        self,
+        query: str,
+        memo: Optional[RetrievalMemo] = None,
+        top_k: int = 3,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[List[Dict], Optional[RetrievalMemo]]:
+        """Get relevant context for a conversational turn, using the session's last retrieval.
+        
+        A bare follow-up ("tell me more about it") reuses the previous results
+        without encoding. Other turns are encoded once: a query close to the
+        previous one reuses its results, a follow-up with new words is scored
+        with its embedding blended with the previous one, and anything else is
+        retrieved from scratch. Returns the context and the memo to keep.
+        """
+        context_data, embeddings = self.context_data, self.embeddings
+        if memo is not None and memo.version != self.context_version:
+            memo = None
+        
+        if memo is None or embeddings is None:
+            relevant_context = await self.get_relevant_context(query, top_k, deadline)
+            return relevant_context, self._make_memo(query, relevant_context)
+        
+        words = re.findall(r"[a-z']+", query.lower())
+        is_followup = any(word in FOLLOWUP_MARKERS for word in words)
+        if is_followup and all(word in FOLLOWUP_MARKERS or word in FILLER_WORDS for word in words):
+            self.followup_stats["reused_without_encode"] += 1
+            return self._reuse_context(memo), memo
+        
+        deadline = deadline or Deadline.from_header(None)
+        if not answer_router.can_afford("retrieval", deadline):
+            logger.info("Skipping embedding retrieval, not enough time left")
+            return self._get_fallback_context(query), memo
+        
+        start_ns = time.perf_counter_ns()
+        timed_out = False
+        try:
+            return await asyncio.wait_for(
+                self._retrieve_turn(query, memo, is_followup, context_data, embeddings, top_k),
+                timeout=answer_router.timeout_for("retrieval", deadline)
             )
-            
-            # Get top-k most similar items
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
-            
-            relevant_context = []
-            for idx in top_indices:
-                if similarities[idx] > 0.25:  # Slightly lower threshold for more results
-                    context_item = self.context_data[idx].copy()
-                    context_item["similarity"] = float(similarities[idx])
-                    relevant_context.append(context_item)
-            
-            # Cache the result
-            self.similarity_cache[cache_key] = relevant_context
-            if len(self.similarity_cache) > 200:
-                # Remove oldest entries
-                keys_to_remove = list(self.similarity_cache.keys())[:50]
-                for key in keys_to_remove:
-                    del self.similarity_cache[key]
-            
-            return relevant_context
-            
         except asyncio.TimeoutError:
+            timed_out = True
             logger.warning("Context similarity calculation timed out, using fallback")
-            return self._get_fallback_context(query)
+            return self._get_fallback_context(query), memo
         except Exception as e:
-            logger.error(f"Error getting relevant context: {e}")
-            return self._get_fallback_context(query)
+            logger.error(f"Error getting session context: {e}")
+            return self._get_fallback_context(query), memo
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            answer_router.record("retrieval", elapsed_ns / 1e9, timed_out)
+            metrics.record_stage("retrieval", elapsed_ns)
+    
+    async def _retrieve_turn(
+        self,
+        query: str,
+        memo: RetrievalMemo,
+        is_followup: bool,
+        context_data: List[Dict],
+        embeddings: np.ndarray,
+        top_k: int
+    ) -> Tuple[List[Dict], RetrievalMemo]:
+        """Encode a turn once and reuse, blend or replace the session's last retrieval"""
+        query_embedding = self._normalize(await self._embed_query(query))
+        
+        if float(np.dot(query_embedding, memo.query_embedding)) >= self.followup_reuse_similarity:
+            self.followup_stats["reused"] += 1
+            return self._reuse_context(memo), memo
+        
+        if is_followup:
+            # Carry the previous topic into the query ("what tech did it use?")
+            weight = self.followup_blend_weight
+            query_embedding = self._normalize((1 - weight) * query_embedding + weight * memo.query_embedding)
+            self.followup_stats["blended"] += 1
+        else:
+            self.followup_stats["fresh"] += 1
+        
+        with metrics.stage("similarity"):
+            similarities = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: cosine_similarity(query_embedding.reshape(1, -1), embeddings)[0]
+            )
+        relevant_context = self._top_context(context_data, similarities, top_k)
+        return relevant_context, self._memo_for(query_embedding, relevant_context)
+    
+    def _top_context(self, context_data: List[Dict], similarities: np.ndarray, top_k: int) -> List[Dict]:
+        """Copy the top-k most similar items above the relevance threshold"""
+        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        
+        relevant_context = []
+        for idx in top_indices:
+            if similarities[idx] > 0.25:  # Slightly lower threshold for more results
+                context_item = context_data[idx].copy()
+                context_item["similarity"] = float(similarities[idx])
+                relevant_context.append(context_item)
+        
+        return relevant_context
+    
+    def _reuse_context(self, memo: RetrievalMemo) -> List[Dict]:
+        """Rebuild a memo's results from the current items"""
+        context_data, item_index = self.context_data, self.item_index
+        relevant_context = []
+        for item_id, similarity in memo.results:
+            idx = item_index.get(item_id)
+            if idx is None:
+                continue
+            context_item = context_data[idx].copy()
+            context_item["similarity"] = similarity
+            relevant_context.append(context_item)
+        return relevant_context
+    
+    def _make_memo(self, query: str, relevant_context: List[Dict]) -> Optional[RetrievalMemo]:
+        """Memo for a turn retrieved without one, if retrieval embedded the query"""
+        query_embedding = self._get_cached_query_embedding(query)
+        if query_embedding is None:
+            return None
+        return self._memo_for(self._normalize(query_embedding), relevant_context)
+    
+    def _memo_for(self, query_embedding: np.ndarray, relevant_context: List[Dict]) -> RetrievalMemo:
+        return RetrievalMemo(
+            self.context_version,
+            query_embedding,
+            tuple((item["id"], item["similarity"]) for item in relevant_context)
+        )
+    
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+    
+    async def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a query in the executor, reusing cached embeddings"""
+        query_embedding = self._get_cached_query_embedding(query)
+        metrics.increment(
+            "ai_cache_requests_total", cache="query_embedding",
+            result="miss" if query_embedding is None else "hit"
+        )
+        if query_embedding is None:
+            # Run embedding in executor to avoid blocking
+            with metrics.stage("embedding"):
+                query_embedding = await asyncio.get_event_loop().run_in_executor(
+                    None, 
+                    lambda: self.embedding_model.encode([query])
+                )
+            self._cache_query_embedding(query, query_embedding)
+        return query_embedding
+    
+    async def _score_query(self, query: str, embeddings: np.ndarray) -> np.ndarray:
+        """Embed a query (cached) and score it against the context embeddings"""
+        query_embedding = await self._embed_query(query)
+        
+        with metrics.stage("similarity"):
+            return await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: cosine_similarity(query_embedding, embeddings)[0]
+            )
+    
+    def classify_intent(self, query: str) -> Optional[Dict]:
+        """Classify a query's intent from the embedding computed during retrieval.
+        
+        Never encodes on its own: when retrieval did not embed the query
+        (lexical fallback or a tight deadline) there is no classification.
+        """
+        query_embedding = self._get_cached_query_embedding(query)
+        if query_embedding is None:
+            return None
+        return self.intent_classifier.classify(query_embedding)
     
     def _get_fallback_context(self, query: str) -> List[Dict]:
         """Get fallback context based on simple keyword matching"""
@@ -285,7 +625,7 @@ class ContextService:
         
         # Simple keyword-based context selection
         for item in self.context_data[:5]:  # Only check first 5 items for speed
-            content_lower = item.get('content', '').lower()
+            content_lower = item.get('content_lower') or item.get('content', '').lower()
             if any(word in content_lower for word in query_lower.split()):
                 fallback_item = item.copy()
                 fallback_item["similarity"] = 0.5  # Default similarity
@@ -295,6 +635,20 @@ class ContextService:
         
         return fallback_context
     
+    async def warmup(self):
+        """Run a dummy embedding pass so the first real query skips lazy initialization"""
+        if self.embedding_model is None:
+            return
+        
+        await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: self.embedding_model.encode(["warmup query about skills and projects"])
+        )
+    
+    def has_data(self) -> bool:
+        """Check if context data is available for lexical retrieval"""
+        return len(self.context_data) > 0
+    
     def is_loaded(self) -> bool:
         """Check if context is loaded"""
         return len(self.context_data) > 0 and self.embeddings is not None
@@ -306,6 +660,8 @@ class ContextService:
             "types": list(set(item.get("type", "") for item in self.context_data)),
             "categories": list(set(item.get("category", "") for item in self.context_data)),
             "embedding_model": self.model_name,
+            "intent_classifier": self.intent_classifier.labels if self.intent_classifier.is_trained() else None,
+            "followups": self.followup_stats,
             "loaded": self.is_loaded()
         }
     
@@ -317,8 +673,10 @@ class ContextService:
             "category": category,
             "source": source
         }
+        self._prepare_item(new_item)
         
         self.context_data.append(new_item)
+        self._reindex()
         
         # Re-create embeddings if model is loaded
         if self.embedding_model:
@@ -329,6 +687,7 @@ class ContextService:
         """Remove a context item by index"""
         if 0 <= index < len(self.context_data):
             self.context_data.pop(index)
+            self._reindex()
             
             # Re-create embeddings
             if self.embedding_model and self.context_data:
@@ -0,0 +1,295 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from services.answer_router import Deadline, LatencyEstimator, answer_router
+from services.instant_responses import get_fast_response
+from services.intent_matcher import intent_matcher
+from services.metrics import metrics
+from services.portfolio_views import PortfolioViews, build_portfolio_views, load_portfolio_data
+from services.session_service import SessionRecord
+from services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class EngineRequest(NamedTuple):
+    """Everything an engine may use to answer one chat message"""
+    message: str
+    session: SessionRecord
+    deadline: Deadline
+    decoding: Optional[str] = None
+
+class AnswerEngine:
+    """One way of answering a chat message.
+
+    Engines load lazily the first time they are selected and return a dict
+    with response, confidence and sources (retrieval engines add a
+    retrieval_memo for the session). Each keeps a live latency estimate so
+    the registry can route around it when it would not fit a deadline.
+    """
+
+    name = "base"
+    initial_latency = 0.001  # Prior for the latency estimate, in seconds
+
+    def __init__(self):
+        self.loaded = False
+        self.latency = LatencyEstimator(self.initial_latency)
+        self.stats = {"answered": 0, "failed": 0}
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    async def load(self):
+        """Load whatever the engine needs; called once, on first use"""
+
+    async def reload(self):
+        """Rebuild the engine's data after the portfolio changed"""
+
+    async def answer(self, request: EngineRequest) -> Dict:
+        raise NotImplementedError
+
+    async def ensure_loaded(self):
+        """Load the engine unless it already is; concurrent callers share one load"""
+        if self.loaded:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.loaded:
+                return
+            start_time = time.perf_counter()
+            await self.load()
+            self.mark_loaded()
+            logger.info(f"✅ Answer engine '{self.name}' loaded in {time.perf_counter() - start_time:.2f}s")
+
+    def mark_loaded(self):
+        """Record that the engine's resources were loaded elsewhere (pre-fork preload)"""
+        self.loaded = True
+
+    async def run(self, request: EngineRequest) -> Dict:
+        """Answer a request, loading the engine first if needed"""
+        await self.ensure_loaded()
+        start_time = time.perf_counter()
+        timed_out = False
+        try:
+            result = await self.answer(request)
+        except Exception as e:
+            self.stats["failed"] += 1
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            raise
+        finally:
+            self.latency.record(time.perf_counter() - start_time, censored=timed_out)
+        self.stats["answered"] += 1
+        metrics.increment("ai_engine_answers_total", engine=self.name)
+        # Results may be shared with a cache, so tag a copy
+        return {**result, "engine": self.name}
+
+    def get_stats(self) -> Dict:
+        """Get load state, answer counts and the live latency estimate"""
+        return {
+            "loaded": self.loaded,
+            **self.stats,
+            "mean_ms": round(self.latency.mean * 1000, 2),
+            "estimate_ms": round(self.latency.estimate() * 1000, 2)
+        }
+
+class InstantEngine(AnswerEngine):
+    """Pre-compiled answers looked up by exact message or matched keyword"""
+
+    name = "instant"
+
+    async def answer(self, request: EngineRequest) -> Dict:
+        response, confidence, sources = get_fast_response(request.message)
+        return {"response": response, "confidence": confidence, "sources": list(sources)}
+
+class TemplateEngine(AnswerEngine):
+    """Intent-matched templates filled in from the portfolio data"""
+
+    name = "template"
+
+    def __init__(self):
+        super().__init__()
+        self.views: Optional[PortfolioViews] = None
+
+    async def load(self):
+        await self.reload()
+
+    async def reload(self):
+        # Read and derive off the event loop, then swap the whole bundle at once
+        self.views = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: build_portfolio_views(load_portfolio_data())
+        )
+
+    async def answer(self, request: EngineRequest) -> Dict:
+        match = intent_matcher.best(request.message.lower().strip())
+        answer = self.views.answer_for(match.intent if match else None)
+        return {
+            "response": random.choice(answer.responses),
+            "confidence": answer.confidence,
+            "sources": list(answer.sources)
+        }
+
+class RetrievalLLMEngine(AnswerEngine):
+    """Retrieval over the portfolio context followed by LLM generation.
+
+    Loading only reads the portfolio data and starts the model loads in the
+    background; until the models are up, answers come from lexical
+    retrieval and the rule-based paths.
+    """
+
+    name = "llm"
+    initial_latency = 2.5
+
+    def __init__(self, context_service, llm_service, loader: Optional[Callable[[], Awaitable]] = None):
+        super().__init__()
+        self.context_service = context_service
+        self.llm_service = llm_service
+        self.loader = loader
+        self.flights = SingleFlight("chat")  # Coalesces identical first-turn questions in flight
+
+    async def load(self):
+        if self.loader is not None:
+            await self.loader()
+        elif not self.context_service.has_data():
+            await self.context_service.load_data()
+
+    async def reload(self):
+        await self.context_service.load_context()
+
+    async def answer(self, request: EngineRequest) -> Dict:
+        session = request.session
+
+        async def answer():
+            # Get relevant context, reusing the session's last retrieval on follow-ups
+            relevant_context, retrieval_memo = await self.context_service.get_session_context(
+                request.message, session.retrieval_memo, deadline=request.deadline
+            )
+            intent = self.context_service.classify_intent(request.message)
+
+            # Generate response
+            response_data = await self.llm_service.generate_response(
+                message=request.message,
+                context=relevant_context,
+                session_id=session.id,
+                deadline=request.deadline,
+                intent=intent,
+                decoding=request.decoding
+            )
+            return {**response_data, "retrieval_memo": retrieval_memo}
+
+        if session.retrieval_memo is not None:
+            return await answer()
+
+        # First turns depend only on the message, so concurrent duplicates
+        # (a trending shared link) share one retrieval and generation. Which
+        # paths fit depends on the time left, so only requests with budgets
+        # in the same power-of-two bucket share a (possibly degraded) answer
+        flight_key = SingleFlight.make_key(
+            request.message, self.context_service.context_version, request.decoding, request.deadline.bucket()
+        )
+        return await self.flights.run(flight_key, answer, timeout=request.deadline.remaining())
+
+    def get_stats(self) -> Dict:
+        return {
+            **super().get_stats(),
+            "single_flight": self.flights.get_stats()
+        }
+
+class EngineRegistry:
+    """Answer engines by name, and the live policy that picks one per request.
+
+    The policy is an engine name or "cascade", which tries ENGINE_CASCADE in
+    order and returns the first answer at or above the confidence floor, so
+    fast engines sit in front of slow ones in-process. An engine other than
+    the last is skipped while its latency estimate does not fit the
+    request's remaining budget, and one that raises falls through to the next. The policy can be changed at runtime, and
+    any request may name an engine or policy of its own.
+    """
+
+    CASCADE = "cascade"
+
+    def __init__(self):
+        self.engines: Dict[str, AnswerEngine] = {}
+        self.policy = os.getenv("ANSWER_ENGINE", "llm").lower()
+        self.cascade = [
+            name.strip().lower()
+            for name in os.getenv("ENGINE_CASCADE", "instant,llm").split(",")
+            if name.strip()
+        ]
+        self.min_confidence = float(os.getenv("ENGINE_CASCADE_MIN_CONFIDENCE", "0.9"))
+        self.cascade_stats = {"fallthroughs": 0, "skipped": 0, "errors": 0}
+
+    def register(self, engine: AnswerEngine):
+        """Add an engine under its name"""
+        self.engines[engine.name] = engine
+
+    def get(self, name: str) -> Optional[AnswerEngine]:
+        """Get an engine by name"""
+        return self.engines.get(name)
+
+    def is_valid(self, policy: str) -> bool:
+        """Check if a policy names a registered engine, or a cascade of them"""
+        if policy == self.CASCADE:
+            return bool(self.cascade) and all(name in self.engines for name in self.cascade)
+        return policy in self.engines
+
+    def engines_for(self, policy: str) -> List[AnswerEngine]:
+        """Engines a policy may use, in the order it tries them"""
+        names = self.cascade if policy == self.CASCADE else [policy]
+        return [self.engines[name] for name in names]
+
+    async def set_policy(self, policy: str):
+        """Switch the default policy at runtime, loading its engines first"""
+        policy = policy.lower()
+        if not self.is_valid(policy):
+            raise ValueError(f"Unknown answer engine or policy: {policy}")
+        await self.preload(policy)
+        previous, self.policy = self.policy, policy
+        logger.info(f"🔀 Answer policy switched from '{previous}' to '{policy}'")
+
+    async def preload(self, policy: Optional[str] = None):
+        """Load the engines a policy uses ahead of traffic"""
+        for engine in self.engines_for(policy or self.policy):
+            await engine.ensure_loaded()
+
+    async def reload(self):
+        """Reload data for every engine that has been loaded"""
+        for engine in self.engines.values():
+            if engine.loaded:
+                await engine.reload()
+
+    async def answer(self, request: EngineRequest, policy: Optional[str] = None) -> Dict:
+        """Answer with the given policy, or the current default policy"""
+        policy = (policy or self.policy).lower()
+        if policy != self.CASCADE:
+            return await self.engines[policy].run(request)
+
+        chain = self.engines_for(policy)
+        for engine in chain[:-1]:
+            # Live routing: a slow engine is skipped while it would not fit the budget
+            if engine.latency.estimate() > answer_router.budget_for(request.deadline):
+                self.cascade_stats["skipped"] += 1
+                engine.latency.skip()
+                continue
+            try:
+                result = await engine.run(request)
+            except Exception as e:
+                # A failing engine is passed over like an unconfident one
+                self.cascade_stats["errors"] += 1
+                logger.warning(f"⚠️ Answer engine '{engine.name}' failed, trying the next one: {e}")
+                continue
+            if result["confidence"] >= self.min_confidence:
+                return result
+            self.cascade_stats["fallthroughs"] += 1
+        return await chain[-1].run(request)
+
+    def get_stats(self) -> Dict:
+        """Get the current policy and per-engine statistics"""
+        return {
+            "policy": self.policy,
+            "cascade": self.cascade,
+            "min_confidence": self.min_confidence,
+            **self.cascade_stats,
+            "engines": {name: engine.get_stats() for name, engine in self.engines.items()}
+        }
@@ -0,0 +1,55 @@
+import math
+from typing import Dict, List
+
+class LogHistogram:
+    """Streaming histogram with fixed logarithmic buckets.
+
+    Bucket upper bounds grow geometrically from `start` by `factor`, with a
+    final overflow bucket. Recording is O(1) (the bucket index comes from a
+    logarithm), and the count, sum and mean are kept alongside, so reading
+    the histogram never touches the observations themselves.
+    """
+
+    def __init__(self, start: float = 1.0, factor: float = 2.0, buckets: int = 16):
+        self.start = start
+        self.factor = factor
+        self.bounds: List[float] = [start * factor ** i for i in range(buckets)]
+        self.counts: List[int] = [0] * (buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one observation"""
+        if value <= self.start:
+            index = 0
+        else:
+            index = min(math.ceil(math.log(value / self.start, self.factor)), len(self.bounds))
+            # Guard against float rounding at exact bucket bounds
+            if index > 0 and value <= self.bounds[index - 1]:
+                index -= 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def mean(self) -> float:
+        """Mean of all observations"""
+        return self.sum / self.count if self.count else 0.0
+
+    def reset(self):
+        """Drop all observations"""
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.sum = 0.0
+
+    def to_dict(self) -> Dict:
+        """Non-empty buckets keyed by upper bound, plus count, sum and mean"""
+        buckets = {}
+        for bound, count in zip(self.bounds + [math.inf], self.counts):
+            if count:
+                buckets["+Inf" if bound == math.inf else f"{bound:g}"] = count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.mean(), 3),
+            "buckets": buckets
+        }
@@ -0,0 +1,120 @@
+from typing import List, Tuple
+
+from services.intent_matcher import intent_matcher
+
+# Pre-compiled responses for instant delivery
+INSTANT_RESPONSES = {
+    # Greetings
+    "hello": "Hello! I'm Suyash's AI assistant. I can help you learn about his skills, projects, and experience. What would you like to know?",
+    "hi": "Hi there! I'm here to answer questions about Suyash's portfolio. Feel free to ask about his skills, projects, or experience!",
+    "hey": "Hey! I can help you explore Suyash's portfolio. Ask me about his technical skills, projects, or professional background.",
+    
+    # Skills
+    "skills": "Suyash specializes in full-stack development with the MERN stack (MongoDB, Express, React, Node.js). He's also experienced in Python, AI/ML integration, and cloud technologies. Check the Skills section for comprehensive details!",
+    "technologies": "His tech stack includes React, Node.js, Python, MongoDB, JavaScript, TypeScript, AI/ML frameworks, and cloud platforms. He builds scalable, modern web applications.",
+    "programming": "Suyash is proficient in JavaScript, Python, TypeScript, and various frameworks. He focuses on clean, maintainable code and modern development practices.",
+    
+    # Projects
+    "projects": "Suyash has built numerous projects including web applications, AI integrations, and full-stack solutions. Visit the Projects section to see detailed case studies and live demos!",
+    "portfolio": "His portfolio showcases diverse projects from web development to AI implementations. Each project demonstrates different technical skills and problem-solving approaches.",
+    "work": "He's worked on various applications including e-commerce platforms, AI-powered tools, and data visualization dashboards. Check out the Projects section for details!",
+    
+    # Experience
+    "experience": "Suyash has hands-on experience in full-stack development, team leadership, and has been recognized in major hackathons. He's currently pursuing his degree while building real-world applications.",
+    "background": "He combines academic learning with practical development experience. His background includes both individual projects and collaborative team work.",
+    "education": "Currently pursuing his degree while actively developing projects and gaining industry experience through internships and competitions.",
+    
+    # Contact
+    "contact": "You can reach Suyash at suyashmishraa983@gmail.com or use the contact form on this website. He's always open to discussing new opportunities!",
+    "email": "His email is suyashmishraa983@gmail.com. Feel free to reach out for collaborations, opportunities, or just to connect!",
+    "hire": "Suyash is open to new opportunities! Contact him at suyashmishraa983@gmail.com or through the contact form to discuss potential collaborations.",
+    
+    # Specific technologies
+    "react": "Suyash is highly skilled in React, building responsive and interactive user interfaces. He uses modern React patterns, hooks, and state management solutions.",
+    "nodejs": "He's experienced with Node.js for backend development, building RESTful APIs, handling databases, and creating scalable server applications.",
+    "python": "Python is one of his strong suits, especially for AI/ML projects, data analysis, and backend development. He's worked with frameworks like FastAPI and Django.",
+    "ai": "Suyash has extensive experience with AI/ML technologies including TensorFlow, PyTorch, and various AI integrations in web applications.",
+    "mongodb": "He's proficient with MongoDB for database design, optimization, and integration with Node.js applications using Mongoose.",
+    
+    # Default
+    "default": "I'm here to help you learn about Suyash's portfolio! You can ask me about his technical skills, projects, professional experience, or how to contact him. What interests you most?"
+}
+
+# Keyword mapping for fast lookup
+KEYWORD_MAP = {
+    # Greetings
+    "hello": "hello", "hi": "hi", "hey": "hey", "greetings": "hello",
+    
+    # Skills
+    "skill": "skills", "skills": "skills", "technology": "technologies", 
+    "technologies": "technologies", "tech": "technologies", "programming": "programming",
+    "development": "skills", "coding": "programming",
+    
+    # Projects
+    "project": "projects", "projects": "projects", "portfolio": "portfolio",
+    "work": "work", "built": "projects", "created": "projects", "application": "projects",
+    
+    # Experience
+    "experience": "experience", "background": "background", "education": "education",
+    "qualification": "background", "career": "experience",
+    
+    # Contact
+    "contact": "contact", "email": "email", "reach": "contact", "hire": "hire",
+    "opportunity": "hire", "connect": "contact",
+    
+    # Technologies
+    "react": "react", "nodejs": "nodejs", "node": "nodejs", "python": "python",
+    "ai": "ai", "ml": "ai", "machine learning": "ai", "artificial intelligence": "ai",
+    "mongodb": "mongodb", "mongo": "mongodb", "database": "mongodb"
+}
+
+# Response used when an intent matched on a keyword missing from KEYWORD_MAP
+INTENT_RESPONSE_KEYS = {
+    "greeting": "hello", "skills": "skills", "projects": "projects",
+    "experience": "experience", "contact": "contact", "ai": "ai",
+    "web_tech": "skills"
+}
+
+# Confidence and sources for each way a response can be found
+RESPONSE_VARIANTS = {
+    "exact": (0.95, ["Fast Response"]),
+    "keyword": (0.9, ["Portfolio Data"]),
+    "keyword_default": (0.7, ["Portfolio Data"]),
+    "default": (0.7, ["AI Assistant"])
+}
+
+# The ai_answers_total path each variant reports, using LLMService's path names
+ANSWER_PATHS = {
+    "exact": "rules",
+    "keyword": "rules",
+    "keyword_default": "fallback",
+    "default": "fallback"
+}
+
+def match_fast_response(message: str) -> Tuple[str, str]:
+    """Find the response key and variant for a message"""
+    message_lower = message.lower().strip()
+    
+    # Direct lookup for exact matches
+    if message_lower in INSTANT_RESPONSES:
+        return message_lower, "exact"
+    
+    # Keyword-based lookup via the shared intent matcher
+    match = intent_matcher.best(message_lower)
+    if match:
+        response_key = next(
+            (KEYWORD_MAP[keyword] for keyword in match.keywords if keyword in KEYWORD_MAP),
+            INTENT_RESPONSE_KEYS.get(match.intent, "default")
+        )
+        if response_key not in INSTANT_RESPONSES:
+            response_key = "default"
+        return response_key, "keyword" if response_key != "default" else "keyword_default"
+    
+    # Default response
+    return "default", "default"
+
+def get_fast_response(message: str) -> Tuple[str, float, List[str]]:
+    """Get instant response using pre-compiled responses"""
+    response_key, variant = match_fast_response(message)
+    confidence, sources = RESPONSE_VARIANTS[variant]
+    return INSTANT_RESPONSES[response_key], confidence, sources
@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def default_examples_path() -> str:
+    """Get the labelled examples shipped with the service"""
+    return os.getenv(
+        "INTENT_EXAMPLES_FILE",
+        os.path.join(os.path.dirname(__file__), "..", "data", "intent_examples.json")
+    )
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over query embeddings.
+
+    Each intent is represented by the normalized mean embedding of its
+    labelled examples. Classifying a query is one small matrix-vector product
+    against the centroids, evaluated in numpy on the embedding that
+    ContextService already computed for retrieval.
+    """
+
+    def __init__(
+        self,
+        examples_path: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        min_margin: Optional[float] = None
+    ):
+        self.examples_path = examples_path or default_examples_path()
+        self.min_confidence = min_confidence if min_confidence is not None else float(
+            os.getenv("INTENT_MIN_CONFIDENCE", "0.55")
+        )
+        self.min_margin = min_margin if min_margin is not None else float(
+            os.getenv("INTENT_MIN_MARGIN", "0.05")
+        )
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    def train(self, embedding_model):
+        """Embed the labelled examples and compute one centroid per intent"""
+        with open(self.examples_path, 'r') as f:
+            examples = json.load(f)
+
+        labels = [label for label, texts in examples.items() if texts]
+        texts = [text for label in labels for text in examples[label]]
+        embeddings = self._normalize(np.asarray(embedding_model.encode(texts), dtype=np.float32))
+
+        centroids = []
+        offset = 0
+        for label in labels:
+            count = len(examples[label])
+            centroids.append(embeddings[offset:offset + count].mean(axis=0))
+            offset += count
+
+        self.centroids = self._normalize(np.vstack(centroids))
+        self.labels = labels
+        logger.info(f"✅ Intent classifier trained: {len(labels)} intents from {len(texts)} examples")
+
+    def is_trained(self) -> bool:
+        """Check if the classifier has centroids"""
+        return self.centroids is not None
+
+    def classify(self, query_embedding: np.ndarray) -> Optional[Dict]:
+        """Classify a query embedding, returning None unless the result is confident"""
+        if self.centroids is None:
+            return None
+
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        scores = self.centroids @ query
+
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else -1.0
+
+        if best < self.min_confidence or best - runner_up < self.min_margin:
+            return None
+
+        return {
+            "intent": self.labels[order[0]],
+            "confidence": round(best, 4),
+            "margin": round(best - runner_up, 4)
+        }
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
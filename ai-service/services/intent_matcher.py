@@ -0,0 +1,266 @@
+import re
+import hashlib
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+# Declarative intent table shared by app.py, simple_app.py and fast_app.py.
+# Keys are keyword phrases (one or more words), values are weights. Intent
+# order breaks ties between equally scored intents.
+PORTFOLIO_INTENTS = {
+    "skills": {
+        "skill": 1.0, "skills": 1.0, "technology": 1.0, "technologies": 1.0,
+        "tech": 1.0, "stack": 0.8, "programming": 1.0, "language": 1.0,
+        "framework": 1.0, "development": 0.5, "developer": 0.5, "coding": 1.0
+    },
+    "projects": {
+        "project": 1.0, "projects": 1.0, "portfolio": 1.0, "work": 0.6,
+        "built": 1.0, "build": 0.8, "develop": 0.8, "developed": 1.0,
+        "developing": 0.8, "create": 0.8, "created": 1.0, "application": 1.0,
+        "app": 0.8
+    },
+    "experience": {
+        "experience": 1.0, "experienced": 1.0, "job": 1.0, "career": 1.0,
+        "professional": 1.0, "background": 1.0, "education": 1.0, "qualification": 1.0,
+        "degree": 0.8, "internship": 1.0
+    },
+    "contact": {
+        "contact": 1.0, "email": 1.0, "reach": 1.0, "connect": 1.0,
+        "linkedin": 1.0, "hire": 1.0, "opportunity": 1.0
+    },
+    "ai": {
+        "ai": 1.0, "ml": 1.0, "artificial intelligence": 1.5,
+        "machine learning": 1.5, "data science": 1.5
+    },
+    "web_tech": {
+        "react": 1.0, "javascript": 1.0, "node": 1.0, "nodejs": 1.0,
+        "node js": 1.0, "python": 1.0, "mongodb": 1.0, "mongo": 1.0,
+        "database": 0.8, "web development": 1.5, "web developer": 1.5
+    },
+    "greeting": {
+        "hello": 0.5, "hi": 0.5, "hey": 0.5, "greeting": 0.5, "greetings": 0.5,
+        "greet": 0.5, "start": 0.3
+    }
+}
+
+# Typo correction: tokens shorter than this are too ambiguous to correct
+# ("here" is one edit from "hire"); longer ones allow more edits
+MIN_CORRECTION_LENGTH = 5
+TWO_EDIT_MIN_LENGTH = 9
+
+# Frequency lexicon: words among the 30,000 most frequent in English that
+# lie within correction reach of a keyword. Only tokens that are not real
+# words are corrected, so "treated" never becomes "created" nor "stars"
+# "start". Generated by generate_common_words.py (which needs wordfreq) for
+# the keyword vocabulary whose fingerprint is recorded below; a test fails
+# when the keywords change until it is rerun.
+COMMON_WORDS_FINGERPRINT = "b63b3b993470"
+COMMON_WORDS = frozenset({
+    "artificially", "beach", "bello", "breach", "carter", "carver", "cello",
+    "cheated", "coming", "congo", "connected", "connector", "contacted",
+    "contract", "contracts", "coping", "crate", "crease", "cremated",
+    "crete", "decree", "dedication", "deduction", "developmental",
+    "duplication", "earning", "educating", "educational", "emulation",
+    "experimented", "gmail", "great", "greed", "greek", "green", "greer",
+    "guild", "guilt", "hella", "hells", "hired", "implication",
+    "inexperienced", "intelligent", "kills", "leach", "leaning",
+    "machinery", "mango", "medication", "peach", "preach", "profession",
+    "professionally", "professions", "projected", "projector", "prospects",
+    "protect", "protects", "quilt", "reconnect", "recreated",
+    "redevelopment", "reduction", "reich", "replication", "roach",
+    "seduction", "shack", "shire", "skull", "skulls", "slack", "smack",
+    "smart", "snack", "spill", "spills", "stacy", "stalk", "stare", "stark",
+    "starr", "stars", "stick", "still", "stills", "stock", "stuart",
+    "stuck", "teach", "treated", "undeveloped", "unprofessional", "yearning"
+})
+
+class IntentMatch(NamedTuple):
+    intent: str
+    score: float
+    keywords: Tuple[str, ...]
+
+class IntentMatcher:
+    """Single-pass, word-boundary-aware keyword matcher.
+
+    The intent table is compiled into an Aho-Corasick automaton whose
+    alphabet is tokens rather than characters, so every keyword phrase is
+    found in one pass over the message (O(message length + matches)) and
+    "hi" can no longer match inside "this".
+
+    Misspelled tokens ("pyhton", "experiance") are corrected first with a
+    SymSpell-style symmetric-delete index built from the keyword vocabulary:
+    a token's deletions are looked up in a hash of the vocabulary's
+    deletions, so candidates are found without scanning the vocabulary.
+    Tokens in the common-words lexicon (COMMON_WORDS by default) are real
+    words and never corrected.
+    """
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, intent_table: Dict[str, Dict[str, float]], common_words: FrozenSet[str] = COMMON_WORDS):
+        self.common_words = common_words
+        self.intent_order = {intent: index for index, intent in enumerate(intent_table)}
+        self.vocabulary = {}  # Token -> first-seen order, which breaks correction ties
+        # Automaton: goto transitions, failure links and outputs per state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for intent, keywords in intent_table.items():
+            for phrase, weight in keywords.items():
+                self._add_phrase(phrase, intent, weight)
+
+        self._build_failure_links()
+        self._delete_index = self._build_delete_index()
+        self.correct = lru_cache(maxsize=4096)(self._correct)
+
+    def _add_phrase(self, phrase: str, intent: str, weight: float):
+        tokens = self.TOKEN_PATTERN.findall(phrase.lower())
+        if not tokens:
+            return
+
+        state = 0
+        for token in tokens:
+            self.vocabulary.setdefault(token, len(self.vocabulary))
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][token] = next_state
+            state = next_state
+
+        self._output[state].append((intent, weight, " ".join(tokens)))
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        head = 0
+
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _build_delete_index(self) -> Dict[str, List[str]]:
+        """Map every deletion variant of each keyword token to the tokens producing it"""
+        index = {}
+        for token in self.vocabulary:
+            if len(token) < MIN_CORRECTION_LENGTH - 1:
+                continue
+            for variant in self._deletes(token, 2):
+                index.setdefault(variant, []).append(token)
+        return index
+
+    @staticmethod
+    def _deletes(word: str, distance: int) -> Set[str]:
+        """The word and every string reachable from it by up to `distance` deletions"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def _edit_distance(a: str, b: str) -> int:
+        """Optimal string alignment distance (Levenshtein plus adjacent transpositions)"""
+        previous2 = None
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    current[j] = min(current[j], previous2[j - 2] + 1)
+            previous2, previous = previous, current
+        return previous[len(b)]
+
+    def _correct(self, token: str) -> str:
+        """Correct a misspelled token to the closest keyword token, if one is close enough"""
+        if len(token) < MIN_CORRECTION_LENGTH or token in self.common_words:
+            return token
+        max_distance = 2 if len(token) >= TWO_EDIT_MIN_LENGTH else 1
+
+        best = None
+        for variant in self._deletes(token, max_distance):
+            for candidate in self._delete_index.get(variant, ()):
+                if abs(len(candidate) - len(token)) > max_distance:
+                    continue
+                distance = self._edit_distance(token, candidate)
+                if distance <= max_distance:
+                    rank = (distance, self.vocabulary[candidate])
+                    if best is None or rank < best[0]:
+                        best = (rank, candidate)
+
+        return best[1] if best else token
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into normalized tokens, folding plurals and typos onto known keywords"""
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        vocabulary = self.vocabulary
+
+        for index, token in enumerate(tokens):
+            if token in vocabulary:
+                continue
+            if len(token) > 3 and token.endswith("s") and token[:-1] in vocabulary:
+                tokens[index] = token[:-1]
+            else:
+                tokens[index] = self.correct(token)
+
+        return tokens
+
+    def match_tokens(self, tokens: List[str]) -> List[IntentMatch]:
+        """Match pre-tokenized input against the intent table"""
+        goto, fail, output = self._goto, self._fail, self._output
+        scores = {}
+        keywords = {}
+        state = 0
+
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            for intent, weight, phrase in output[state]:
+                matched = keywords.setdefault(intent, [])
+                # Count each keyword once per message
+                if phrase not in matched:
+                    matched.append(phrase)
+                    scores[intent] = scores.get(intent, 0.0) + weight
+
+        return sorted(
+            (IntentMatch(intent, score, tuple(keywords[intent])) for intent, score in scores.items()),
+            key=lambda match: (-match.score, self.intent_order[match.intent])
+        )
+
+    def match(self, text: str) -> List[IntentMatch]:
+        """Get all matching intents for a message, best first"""
+        return self.match_tokens(self.tokenize(text))
+
+    def best(self, text: str) -> Optional[IntentMatch]:
+        """Get the best matching intent for a message, if any"""
+        matches = self.match(text)
+        return matches[0] if matches else None
+
+def vocabulary_fingerprint(intent_table: Dict[str, Dict[str, float]]) -> str:
+    """Fingerprint of what decides which words are within correction reach of a keyword"""
+    tokens = sorted({
+        token
+        for keywords in intent_table.values()
+        for phrase in keywords
+        for token in IntentMatcher.TOKEN_PATTERN.findall(phrase.lower())
+    })
+    source = f"{MIN_CORRECTION_LENGTH},{TWO_EDIT_MIN_LENGTH}:" + " ".join(tokens)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+
+# Compiled once at import and shared by every service
+intent_matcher = IntentMatcher(PORTFOLIO_INTENTS)
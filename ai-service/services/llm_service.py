@@ -1,5 +1,6 @@
 import os
 import logging
+import time
 import asyncio
 from typing import Dict, List, Optional
 import torch
@@ -9,11 +10,25 @@ from transformers import (
     pipeline,
     BitsAndBytesConfig
 )
-from functools import lru_cache
+
+from services.intent_matcher import intent_matcher
+from services.answer_router import Deadline, answer_router
+from services.response_cache import ResponseCache
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 class LLMService:
+    # Bump when prompt construction, decoding settings or post-processing
+    # change so cached responses from the previous version are not reused
+    PROMPT_VERSION = "2"
+    
+    # Decoding modes; greedy and beam are reproducible for the same prompt,
+    # so only their outputs are cached
+    DECODING_MODES = ("greedy", "beam", "sample")
+    DETERMINISTIC_MODES = ("greedy", "beam")
+    
     def __init__(self):
         self.model = None
         self.tokenizer = None
@@ -22,26 +37,36 @@ class LLMService:
         self.model_name = os.getenv("MODEL_NAME", "distilgpt2")
         self.max_length = int(os.getenv("MAX_LENGTH", "256"))  # Reduced for speed
         self.temperature = float(os.getenv("TEMPERATURE", "0.7"))
+        self.decoding_mode = self._resolve_decoding_mode(os.getenv("DECODING_MODE", "greedy"), "greedy")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.response_cache = {}  # Simple response cache
+        self.response_cache = ResponseCache()  # In-process L1 over a shared SQLite L2
+        self.generation_timeout = float(os.getenv("GENERATION_TIMEOUT", "5.0"))  # Upper bound per generation
+        self.breaker = CircuitBreaker("llm")  # Skips generation while it keeps timing out
+        self.classified_answers = 0  # Generations avoided by the intent classifier
+        self.generation_batch_size = int(os.getenv("GENERATION_BATCH_SIZE", "8"))  # Prompts per batched pipeline call
+        self.batch_generation_timeout = float(os.getenv("BATCH_GENERATION_TIMEOUT", "60.0"))  # Upper bound per generation batch
         
     async def load_model(self):
+        """Load the LLM model in a worker thread so the event loop keeps serving"""
+        await asyncio.get_event_loop().run_in_executor(None, self._load_model_sync)
+    
+    def _load_model_sync(self):
         """Load the LLM model"""
         try:
             logger.info(f"Loading lightweight model: {self.model_name}")
             
             # Load tokenizer (faster loading)
-            self.tokenizer = AutoTokenizer.from_pretrained(
+            tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
                 padding_side="left"
             )
             
             # Add pad token if it doesn't exist
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
             
             # Load model with minimal configuration for speed
-            self.model = AutoModelForCausalLM.from_pretrained(
+            model = AutoModelForCausalLM.from_pretrained(
                 self.model_name,
                 torch_dtype=torch.float32,  # Use float32 for CPU compatibility
                 low_cpu_mem_usage=True
@@ -50,16 +75,18 @@ class LLMService:
             # Create optimized pipeline
             self.pipeline = pipeline(
                 "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
+                model=model,
+                tokenizer=tokenizer,
                 device=-1,  # Force CPU for consistency
                 return_full_text=False,
-                do_sample=True,
-                temperature=self.temperature,
                 max_new_tokens=80,  # Reduced for faster generation
-                pad_token_id=self.tokenizer.eos_token_id
+                pad_token_id=tokenizer.eos_token_id
             )
             
+            # Publish the model last: is_loaded() flips only once the pipeline exists
+            self.tokenizer = tokenizer
+            self.model = model
+            
             logger.info(f"✅ Lightweight model loaded successfully")
             
         except Exception as e:
@@ -102,94 +129,134 @@ class LLMService:
         """Check if model is loaded"""
         return self.model is not None and self.tokenizer is not None
     
-    @lru_cache(maxsize=100)
-    def _get_cached_response(self, message_hash: str, context_hash: str) -> Optional[Dict]:
+    def _resolve_decoding_mode(self, mode: Optional[str], default: str) -> str:
+        """Validate a decoding mode name, falling back to the default"""
+        mode = (mode or "").lower()
+        return mode if mode in self.DECODING_MODES else default
+    
+    def _generation_kwargs(self, mode: str) -> Dict:
+        """Pipeline arguments for a decoding mode"""
+        if mode == "sample":
+            return {
+                "temperature": self.temperature,
+                "do_sample": True,
+                "top_p": 0.9,
+                "repetition_penalty": 1.1
+            }
+        
+        # Deterministic modes skip sampling, so they draw nothing from the RNG
+        # and need no seed; the repetition penalty keeps greedy output from looping
+        kwargs = {
+            "do_sample": False,
+            "num_beams": 2 if mode == "beam" else 1,
+            "repetition_penalty": 1.1
+        }
+        if mode == "beam":
+            kwargs["early_stopping"] = True
+        return kwargs
+    
+    def _generate(self, prompt: str, mode: str):
+        """Run the pipeline for a decoding mode (called in a worker thread)"""
+        return self.pipeline(
+            prompt,
+            max_new_tokens=60,  # Further reduced for speed
+            num_return_sequences=1,
+            **self._generation_kwargs(mode)
+        )
+    
+    def _generate_batch(self, prompts: List[str], mode: str) -> List:
+        """Run the pipeline over several prompts in padded batches (called in a worker thread)"""
+        return self.pipeline(
+            prompts,
+            batch_size=self.generation_batch_size,
+            max_new_tokens=60,
+            num_return_sequences=1,
+            **self._generation_kwargs(mode)
+        )
+    
+    def _get_cache_key(self, message: str, context: List[Dict], mode: str) -> str:
+        """Build a content-stable cache key shared by every worker process"""
+        context_ids = [
+            item.get('id') or ResponseCache.make_key(item.get('content', ''), [], "content")
+            for item in context
+        ]
+        return ResponseCache.make_key(
+            message, context_ids, f"{self.model_name}:{self.PROMPT_VERSION}:{mode}"
+        )
+    
+    async def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
         """Get cached response if available"""
-        cache_key = f"{message_hash}_{context_hash}"
-        return self.response_cache.get(cache_key)
+        return await self.response_cache.get(cache_key)
     
-    def _cache_response(self, message_hash: str, context_hash: str, response: Dict):
+    def _cache_response(self, cache_key: str, response: Dict):
         """Cache response for future use"""
-        cache_key = f"{message_hash}_{context_hash}"
-        self.response_cache[cache_key] = response
-        # Keep cache size manageable
-        if len(self.response_cache) > 200:
-            # Remove oldest entries
-            keys_to_remove = list(self.response_cache.keys())[:50]
-            for key in keys_to_remove:
-                del self.response_cache[key]
+        self.response_cache.set(cache_key, response)
 
     async def generate_response(
         self, 
         message: str, 
         context: List[Dict], 
-        session_id: str
+        session_id: str,
+        deadline: Optional[Deadline] = None,
+        intent: Optional[Dict] = None,
+        decoding: Optional[str] = None
     ) -> Dict:
-        """Generate response using the LLM with caching and optimizations"""
+        """Generate response using the LLM with caching and optimizations.
+        
+        The LLM path is only started when its live latency estimate fits in
+        the request's remaining budget, and its timeout comes from the same
+        deadline, so the caller always gets an answer before it gives up.
+        """
+        deadline = deadline or Deadline.from_header(None)
+        mode = self._resolve_decoding_mode(decoding, self.decoding_mode)
+        
         try:
-            # Create hashes for caching
-            message_hash = str(hash(message.lower().strip()))
-            context_hash = str(hash(str(sorted([item.get('content', '') for item in context]))))
+            cache_key = self._get_cache_key(message, context, mode)
+            quick_response = await self._get_quick_response(message, context, intent, cache_key)
+            if quick_response:
+                return quick_response
             
-            # Check cache first
-            cached_response = self._get_cached_response(message_hash, context_hash)
-            if cached_response:
-                logger.info("Returning cached response")
-                return cached_response
-            
-            # Use rule-based responses for common queries (fastest)
-            rule_based_response = self._get_rule_based_response(message, context)
-            if rule_based_response:
-                self._cache_response(message_hash, context_hash, rule_based_response)
-                return rule_based_response
-            
-            # If model is loaded, use it for complex queries
-            if self.is_loaded():
+            # If model is loaded, generation fits the budget and the breaker is
+            # closed (or this request is a probe), use it for complex queries
+            if (
+                self.is_loaded()
+                and answer_router.can_afford("llm", deadline)
+                and self.breaker.allow_request()
+            ):
                 # Build prompt with context
                 prompt = self._build_prompt(message, context)
                 
                 # Generate response with timeout
-                response = await asyncio.wait_for(
-                    asyncio.get_event_loop().run_in_executor(
-                        None, 
-                        lambda: self.pipeline(
-                            prompt,
-                            max_new_tokens=60,  # Further reduced for speed
-                            num_return_sequences=1,
-                            temperature=self.temperature,
-                            do_sample=True,
-                            top_p=0.9,
-                            repetition_penalty=1.1
-                        )
-                    ),
-                    timeout=5.0  # 5 second timeout for generation
-                )
-                
-                generated_text = response[0]["generated_text"].strip()
-                
-                # Post-process response
-                processed_response = self._post_process_response(generated_text, message)
-                
-                # Calculate confidence (simple heuristic)
-                confidence = self._calculate_confidence(processed_response, context)
-                
-                # Extract sources
-                sources = [item.get("source", "") for item in context if item.get("source")]
+                start_ns = time.perf_counter_ns()
+                timed_out = False
+                try:
+                    response = await asyncio.wait_for(
+                        asyncio.get_event_loop().run_in_executor(
+                            None, self._generate, prompt, mode
+                        ),
+                        timeout=min(self.generation_timeout, answer_router.timeout_for("llm", deadline))
+                    )
+                    self.breaker.record_success()
+                except Exception as e:
+                    self.breaker.record_failure()
+                    timed_out = isinstance(e, asyncio.TimeoutError)
+                    raise
+                finally:
+                    elapsed_ns = time.perf_counter_ns() - start_ns
+                    answer_router.record("llm", elapsed_ns / 1e9, timed_out)
+                    metrics.record_stage("generation", elapsed_ns)
                 
-                result = {
-                    "response": processed_response,
-                    "confidence": confidence,
-                    "sources": sources[:3]  # Limit to top 3 sources
-                }
+                result = self._build_generated_result(response[0]["generated_text"], message, context)
+                metrics.increment("ai_answers_total", path="llm")
                 
-                # Cache the result
-                self._cache_response(message_hash, context_hash, result)
+                # Cache the result; sampled output is not reproducible
+                if mode in self.DETERMINISTIC_MODES:
+                    self._cache_response(cache_key, result)
                 return result
             else:
-                # Fallback to rule-based response
-                fallback = self._get_fallback_response(message)
-                self._cache_response(message_hash, context_hash, fallback)
-                return fallback
+                # Fallback to rule-based response; not cached so the LLM path
+                # takes over once the model finishes loading or time allows
+                return self._get_fallback_response(message)
             
         except asyncio.TimeoutError:
             logger.warning("Model generation timed out, using fallback")
@@ -199,6 +266,138 @@ class LLMService:
             logger.error(f"Response generation error: {e}")
             return self._get_fallback_response(message)
     
+    async def generate_responses(
+        self,
+        messages: List[str],
+        contexts: List[List[Dict]],
+        intents: Optional[List[Optional[Dict]]] = None,
+        decoding: Optional[str] = None
+    ) -> List[Dict]:
+        """Answer many independent messages, batching the generations.
+        
+        Cached, rule-based and classified answers are resolved first without
+        touching the model; the remaining prompts go through the pipeline in
+        padded batches. Every item gets an answer: a failed batch or a bad
+        output only falls back for the items it affects.
+        """
+        mode = self._resolve_decoding_mode(decoding, self.decoding_mode)
+        intents = intents or [None] * len(messages)
+        results: List[Optional[Dict]] = [None] * len(messages)
+        cache_keys: List[Optional[str]] = [None] * len(messages)
+        pending = []
+        
+        for i, (message, context, intent) in enumerate(zip(messages, contexts, intents)):
+            try:
+                cache_keys[i] = self._get_cache_key(message, context, mode)
+                results[i] = await self._get_quick_response(message, context, intent, cache_keys[i])
+            except Exception as e:
+                logger.error(f"Batch item {i} error: {e}")
+            if results[i] is None:
+                pending.append(i)
+        
+        loop = asyncio.get_event_loop()
+        for start in range(0, len(pending), self.generation_batch_size):
+            chunk = pending[start:start + self.generation_batch_size]
+            if not self.is_loaded() or not self.breaker.allow_request():
+                continue
+            
+            try:
+                prompts = [self._build_prompt(messages[i], contexts[i]) for i in chunk]
+                with metrics.stage("generation"):
+                    outputs = await asyncio.wait_for(
+                        loop.run_in_executor(None, self._generate_batch, prompts, mode),
+                        timeout=self.batch_generation_timeout
+                    )
+                self.breaker.record_success()
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.warning(f"Batch generation failed for {len(chunk)} items, using fallback: {e}")
+                continue
+            
+            for i, output in zip(chunk, outputs):
+                try:
+                    results[i] = self._build_generated_result(output[0]["generated_text"], messages[i], contexts[i])
+                    metrics.increment("ai_answers_total", path="llm")
+                    if mode in self.DETERMINISTIC_MODES and cache_keys[i]:
+                        self._cache_response(cache_keys[i], results[i])
+                except Exception as e:
+                    logger.error(f"Batch item {i} post-processing error: {e}")
+        
+        return [
+            result if result is not None else self._get_fallback_response(message)
+            for result, message in zip(results, messages)
+        ]
+    
+    async def _get_quick_response(
+        self,
+        message: str,
+        context: List[Dict],
+        intent: Optional[Dict],
+        cache_key: str
+    ) -> Optional[Dict]:
+        """Answer from the cache, the rules or the intent templates, without the model"""
+        # Check cache first
+        with metrics.stage("cache"):
+            cached_response = await self._get_cached_response(cache_key)
+        if cached_response:
+            logger.info("Returning cached response")
+            metrics.increment("ai_answers_total", path="cache")
+            return cached_response
+        
+        # Use rule-based responses for common queries (fastest)
+        rule_start_ns = time.perf_counter_ns()
+        rule_based_response = self._get_rule_based_response(message, context)
+        rule_elapsed_ns = time.perf_counter_ns() - rule_start_ns
+        answer_router.record("rules", rule_elapsed_ns / 1e9)
+        metrics.record_stage("rules", rule_elapsed_ns)
+        if rule_based_response:
+            metrics.increment("ai_answers_total", path="rules")
+            self._cache_response(cache_key, rule_based_response)
+            return rule_based_response
+        
+        # Confidently classified queries get a templated answer instead of generation
+        if intent:
+            intent_response = self._build_intent_response(intent["intent"], context)
+            if intent_response:
+                self.classified_answers += 1
+                metrics.increment("ai_answers_total", path="intent")
+                self._cache_response(cache_key, intent_response)
+                return intent_response
+        
+        return None
+    
+    def _build_generated_result(self, generated_text: str, message: str, context: List[Dict]) -> Dict:
+        """Turn raw generated text into a response with confidence and sources"""
+        # Post-process response
+        processed_response = self._post_process_response(generated_text.strip(), message)
+        
+        # Calculate confidence (simple heuristic)
+        confidence = self._calculate_confidence(processed_response, context)
+        
+        # Extract sources
+        sources = [item.get("source", "") for item in context if item.get("source")]
+        
+        return {
+            "response": processed_response,
+            "confidence": confidence,
+            "sources": sources[:3]  # Limit to top 3 sources
+        }
+    
+    async def warmup(self):
+        """Run a short dummy generation so the first real request skips lazy initialization"""
+        if not self.is_loaded():
+            return
+        
+        await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: self.pipeline(
+                self._build_prompt("hello", []),
+                max_new_tokens=8,
+                num_return_sequences=1,
+                do_sample=False
+            )
+        )
+    
     def _build_prompt(self, message: str, context: List[Dict]) -> str:
         """Build prompt with context"""
         # System prompt
@@ -245,14 +444,17 @@ Context information:"""
         """Calculate confidence score for the response"""
         base_confidence = 0.7
         
-        # Increase confidence if response uses context
+        # Increase confidence if response uses context. Token sets are
+        # precomputed per context item when the snapshot loads, so only the
+        # (short) response is tokenized and each item costs one set
+        # intersection in C, independent of the item's length
         if context:
-            context_words = set()
-            for item in context:
-                context_words.update(item.get('content', '').lower().split())
-            
             response_words = set(response.lower().split())
-            overlap = len(context_words.intersection(response_words))
+            used_words = set()
+            for item in context:
+                tokens = item.get('tokens') or frozenset(item.get('content', '').lower().split())
+                used_words |= response_words & tokens
+            overlap = len(used_words)
             
             if overlap > 0:
                 base_confidence += min(0.2, overlap * 0.05)
@@ -266,10 +468,17 @@ Context information:"""
     
     def _get_rule_based_response(self, message: str, context: List[Dict]) -> Optional[Dict]:
         """Get rule-based response for common queries (fastest response)"""
-        message_lower = message.lower().strip()
+        match = intent_matcher.best(message)
+        if not match:
+            # No rule matches (will use model or fallback)
+            return None
         
+        return self._build_intent_response(match.intent, context)
+    
+    def _build_intent_response(self, intent: str, context: List[Dict]) -> Optional[Dict]:
+        """Build the templated answer for an intent"""
         # Enhanced rule-based responses with context integration
-        if any(word in message_lower for word in ['skill', 'technology', 'tech', 'programming', 'language']):
+        if intent in ("skills", "web_tech"):
             context_skills = [item for item in context if item.get('type') == 'skills']
             if context_skills:
                 skills_content = context_skills[0].get('content', '')
@@ -284,10 +493,10 @@ Context information:"""
                 "sources": ["Skills Section"]
             }
         
-        if any(word in message_lower for word in ['project', 'work', 'built', 'developed', 'created']):
+        if intent == "projects":
             context_projects = [item for item in context if item.get('type') == 'project']
             if context_projects:
-                project_info = context_projects[0].get('content', '')[:200] + "..."
+                project_info = context_projects[0].get('summary') or context_projects[0].get('content', '')[:200] + "..."
                 return {
                     "response": f"Here's one of the notable projects: {project_info} You can explore all projects in the Projects section.",
                     "confidence": 0.85,
@@ -299,10 +508,10 @@ Context information:"""
                 "sources": ["Projects Section"]
             }
         
-        if any(word in message_lower for word in ['experience', 'job', 'work', 'career', 'professional']):
+        if intent == "experience":
             context_exp = [item for item in context if item.get('type') == 'experience']
             if context_exp:
-                exp_info = context_exp[0].get('content', '')[:200] + "..."
+                exp_info = context_exp[0].get('summary') or context_exp[0].get('content', '')[:200] + "..."
                 return {
                     "response": f"Professional experience includes: {exp_info} Check the Resume section for complete work history.",
                     "confidence": 0.85,
@@ -314,28 +523,27 @@ Context information:"""
                 "sources": ["Resume Section"]
             }
         
-        if any(word in message_lower for word in ['contact', 'reach', 'email', 'connect', 'hire']):
+        if intent == "contact":
             return {
                 "response": "You can contact Suyash through the Contact section of this portfolio. He's always open to discussing new opportunities and collaborations.",
                 "confidence": 0.9,
                 "sources": ["Contact Section"]
             }
         
-        if any(word in message_lower for word in ['hello', 'hi', 'hey', 'greet']):
+        if intent == "greeting":
             return {
                 "response": "Hello! I'm Suyash's AI assistant. I can help you learn about his skills, projects, and experience. What would you like to know?",
                 "confidence": 0.9,
                 "sources": []
             }
         
-        if any(word in message_lower for word in ['ai', 'artificial intelligence', 'machine learning', 'ml', 'data science']):
+        if intent == "ai":
             return {
                 "response": "Suyash has extensive experience with AI/ML technologies including Python, TensorFlow, PyTorch, and data analysis. He's worked on various AI projects and implementations.",
                 "confidence": 0.85,
                 "sources": ["Skills Section", "Projects Section"]
             }
         
-        # Return None if no rule matches (will use model or fallback)
         return None
 
     def _get_fallback_response(self, message: str) -> Dict:
@@ -348,13 +556,9 @@ Context information:"""
             "default": "I'm here to help you learn about this portfolio. Please explore the different sections or ask specific questions about skills, projects, or experience."
         }
         
-        message_lower = message.lower()
-        response_key = "default"
-        
-        for key in fallback_responses:
-            if key in message_lower:
-                response_key = key
-                break
+        match = intent_matcher.best(message)
+        response_key = match.intent if match and match.intent in fallback_responses else "default"
+        metrics.increment("ai_answers_total", path="fallback")
         
         return {
             "response": fallback_responses[response_key],
@@ -369,5 +573,8 @@ Context information:"""
             "device": self.device,
             "max_length": self.max_length,
             "temperature": self.temperature,
-            "loaded": self.is_loaded()
+            "decoding_mode": self.decoding_mode,
+            "loaded": self.is_loaded(),
+            "circuit_breaker": self.breaker.get_stats(),
+            "classified_answers": self.classified_answers
         }
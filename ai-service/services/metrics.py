@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.histogram import LogHistogram
+from services.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, Labels]
+
+# Latency buckets double from 0.1ms up to ~13s, plus +Inf
+LATENCY_START = 0.0001
+LATENCY_FACTOR = 2.0
+LATENCY_BUCKETS = 18
+
+# Snapshot holding the merged metrics of workers that have exited
+RETIRED_SNAPSHOT = "retired.json"
+
+METRIC_HELP = {
+    "ai_request_duration_seconds": ("histogram", "Request latency by route"),
+    "ai_stage_duration_seconds": ("histogram", "Answer latency by stage"),
+    "ai_requests_total": ("counter", "Requests by route and status"),
+    "ai_answers_total": ("counter", "Answers by the path that produced them"),
+    "ai_engine_answers_total": ("counter", "Answers by answer engine"),
+    "ai_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "ai_cache_hit_ratio": ("gauge", "Share of cache lookups that hit, by cache"),
+    "ai_single_flight_total": ("counter", "Single-flight calls by flight and role (leader, coalesced, waiter_fallback)"),
+    "ai_metrics_workers": ("gauge", "Workers whose metrics are merged into this scrape")
+}
+
+class Metrics:
+    """Latency histograms and counters, rendered in the Prometheus text format.
+
+    Every process records into its own plain dicts from the event loop, so
+    recording takes no locks. With pre-forked workers each worker also
+    writes a snapshot file to a shared directory now and then, and whichever
+    worker answers /metrics merges its live state with the others'
+    snapshots. When the master reaps a worker it folds the worker's last
+    snapshot into a retired snapshot and deletes the worker's file, so
+    counters never go backwards and ai_metrics_workers counts live workers.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[MetricKey, LogHistogram] = {}
+        self.counters: Dict[MetricKey, float] = {}
+        self.directory = None
+        self.snapshot_interval = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+        self.bucket_bounds = [
+            f"{bound:g}" for bound in self._new_histogram().bounds
+        ] + ["+Inf"]
+
+    @staticmethod
+    def _new_histogram() -> LogHistogram:
+        return LogHistogram(LATENCY_START, LATENCY_FACTOR, LATENCY_BUCKETS)
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        """Record a latency observation"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = self._new_histogram()
+        histogram.observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record_stage(self, stage: str, elapsed_ns: int):
+        """Record a stage timing in its histogram and in the current request's trace"""
+        self.observe("ai_stage_duration_seconds", elapsed_ns / 1e9, stage=stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed_ns)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one answer stage"""
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter_ns() - start_ns)
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        self.histograms = {}
+        self.counters = {}
+
+    def share_across_workers(self, directory: str):
+        """Merge metrics across pre-forked workers through snapshot files.
+
+        Call in the master before forking. Observations made while preloading
+        are dropped so workers do not each inherit a copy of them.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith("worker-") or name.startswith(RETIRED_SNAPSHOT):
+                os.remove(os.path.join(directory, name))
+        self.directory = directory
+        self.reset()
+        logger.info(f"✅ Sharing metrics across workers in {directory}")
+
+    def snapshot(self) -> Dict:
+        """Copy the current metrics into JSON-serializable form"""
+        return {
+            "histograms": [
+                [name, labels, list(histogram.counts), histogram.sum]
+                for (name, labels), histogram in self.histograms.items()
+            ],
+            "counters": [[name, labels, value] for (name, labels), value in self.counters.items()]
+        }
+
+    def write_snapshot(self, snapshot: Dict, name: Optional[str] = None):
+        """Atomically replace this worker's snapshot file (or a named one)"""
+        path = os.path.join(self.directory, name or f"worker-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        # Readers see either the previous snapshot or this one, never a partial file
+        os.replace(path + ".tmp", path)
+
+    def retire_worker(self, pid: int):
+        """Fold an exited worker's last snapshot into the retired one (called by the master)"""
+        if not self.directory:
+            return
+
+        path = os.path.join(self.directory, f"worker-{pid}.json")
+        try:
+            with open(path, "r") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            snapshot = None
+        if snapshot is not None:
+            retired = self._read_snapshot(RETIRED_SNAPSHOT) or {"pids": [], "histograms": [], "counters": []}
+            histograms, counters = {}, {}
+            for previous in (retired, snapshot):
+                _merge_snapshot(histograms, counters, previous)
+            # Written before the worker's file is removed; readers that still
+            # see that file skip it because its pid is listed here
+            self.write_snapshot({
+                "retired": True,
+                "pids": retired["pids"] + [pid],
+                "histograms": [
+                    [name, labels, counts, total] for (name, labels), (counts, total) in histograms.items()
+                ],
+                "counters": [[name, labels, value] for (name, labels), value in counters.items()]
+            }, RETIRED_SNAPSHOT)
+
+        for stale in (path, path + ".tmp"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def _read_snapshot(self, name: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directory, name), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_peer_snapshots(self) -> List[Dict]:
+        """Load the latest snapshot of every other worker (blocking file reads)"""
+        if not self.directory:
+            return []
+
+        own = f"worker-{os.getpid()}.json"
+        snapshots = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json") or name == own:
+                continue
+            snapshot = self._read_snapshot(name)
+            if snapshot is not None:
+                snapshots[name] = snapshot
+
+        retired_pids = snapshots.get(RETIRED_SNAPSHOT, {}).get("pids", [])
+        for pid in retired_pids:
+            snapshots.pop(f"worker-{pid}.json", None)
+        return list(snapshots.values())
+
+    async def run_snapshots(self):
+        """Background task writing this worker's snapshot periodically"""
+        if not self.directory:
+            return
+
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                # Copy on the event loop, write in the executor
+                await loop.run_in_executor(None, self.write_snapshot, self.snapshot())
+            except Exception as e:
+                logger.error(f"❌ Metrics snapshot error: {e}")
+
+    def render(self, peer_snapshots: List[Dict] = ()) -> str:
+        """Render this worker's metrics merged with peer snapshots"""
+        histograms = {key: (list(histogram.counts), histogram.sum) for key, histogram in self.histograms.items()}
+        counters = dict(self.counters)
+
+        for snapshot in peer_snapshots:
+            _merge_snapshot(histograms, counters, snapshot)
+
+        gauges = self._cache_hit_ratios(counters)
+        live_peers = sum(1 for snapshot in peer_snapshots if not snapshot.get("retired"))
+        gauges[("ai_metrics_workers", ())] = 1 + live_peers
+
+        samples: Dict[str, List[str]] = {}
+        for (name, labels), (counts, total) in sorted(histograms.items()):
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.bucket_bounds, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        for (name, labels), value in sorted(counters.items()) + sorted(gauges.items()):
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        output = []
+        for name, lines in samples.items():
+            kind, description = METRIC_HELP.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+    @staticmethod
+    def _cache_hit_ratios(counters: Dict[MetricKey, float]) -> Dict[MetricKey, float]:
+        """Hit ratio per cache; every result other than "miss" counts as a hit"""
+        lookups: Dict[str, List[float]] = {}
+        for (name, labels), value in counters.items():
+            if name != "ai_cache_requests_total":
+                continue
+            label_map = dict(labels)
+            totals = lookups.setdefault(label_map.get("cache", ""), [0, 0])
+            totals[1] += value
+            if label_map.get("result") != "miss":
+                totals[0] += value
+        return {
+            ("ai_cache_hit_ratio", (("cache", cache),)): hits / total
+            for cache, (hits, total) in lookups.items()
+            if total
+        }
+
+def _merge_snapshot(
+    histograms: Dict[MetricKey, Tuple[List[int], float]],
+    counters: Dict[MetricKey, float],
+    snapshot: Dict
+):
+    """Add a snapshot's histogram counts and counter values into merged dicts"""
+    for name, labels, counts, total in snapshot["histograms"]:
+        key = (name, tuple(tuple(label) for label in labels))
+        merged_counts, merged_sum = histograms.get(key, ([0] * len(counts), 0.0))
+        histograms[key] = ([a + b for a, b in zip(merged_counts, counts)], merged_sum + total)
+    for name, labels, value in snapshot["counters"]:
+        key = (name, tuple(tuple(label) for label in labels))
+        counters[key] = counters.get(key, 0) + value
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency and status per route template"""
+
+    def __init__(self, app, registry: Metrics = None):
+        self.app = app
+        self.metrics = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route templates keep ids out of the label values
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe("ai_request_duration_seconds", time.perf_counter() - start_time, route=route)
+            self.metrics.increment("ai_requests_total", route=route, status=str(status))
+
+# Process-wide registry shared by the services and the app
+metrics = Metrics()
@@ -0,0 +1,171 @@
+import os
+import json
+import logging
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fixed template lines that do not depend on portfolio data
+GREETING_TEMPLATES = (
+    "Hello! I'm Suyash's AI assistant. I can help you learn about his skills, projects, and experience.",
+    "Hi there! I'm here to answer questions about Suyash's portfolio. What would you like to know?",
+    "Welcome! I can provide information about Suyash's work, skills, and projects. How can I help?"
+)
+DEFAULT_TEMPLATES = (
+    "I'm here to help you learn about Suyash's portfolio. You can ask me about his skills, projects, experience, or how to contact him.",
+    "I can provide information about Suyash's technical skills, project experience, and background. What specific area interests you?",
+    "Feel free to ask me about Suyash's work, education, skills, or any specific projects you'd like to know more about."
+)
+AI_RESPONSE = "Suyash has extensive experience with AI/ML technologies including Python, TensorFlow, PyTorch, and data analysis. He's worked on various AI projects and integrations. Check his projects for AI-related work!"
+WEB_TECH_RESPONSE = "Suyash is proficient in modern web development technologies including React, Node.js, Python, MongoDB, and the full MERN stack. He builds scalable, responsive web applications with clean, maintainable code."
+DEFAULT_EMAIL = "suyashmishraa983@gmail.com"
+
+class Answer(NamedTuple):
+    """Candidate responses for one intent, plus its confidence and sources"""
+    responses: Tuple[str, ...]
+    confidence: float
+    sources: Tuple[str, ...]
+
+class PortfolioViews(NamedTuple):
+    """Every view derived from the portfolio data, built together at load.
+
+    A reload builds a new bundle and replaces the single global reference,
+    so a request always sees one consistent snapshot and answering is a
+    dict lookup.
+    """
+    data: Dict
+    skills_summary: str
+    project_count: int
+    featured_project: str
+    experience_line: str
+    contact_line: str
+    templates: Mapping[str, Tuple[str, ...]]
+    answers: Mapping[str, Answer]
+
+    def answer_for(self, intent: Optional[str]) -> Answer:
+        """Answer for an intent, or the default answer"""
+        return self.answers.get(intent or "default", self.answers["default"])
+
+def summarize_skills(data: Dict) -> str:
+    """Top skills of the first three technical categories"""
+    skills_info = []
+    for category, skills in (data.get('skills', {}).get('technical') or {}).items():
+        if skills:
+            skill_names = [skill.get('name', skill) if isinstance(skill, dict) else skill for skill in skills]
+            skills_info.append(f"{category}: {', '.join(skill_names[:3])}")
+    return '; '.join(skills_info[:3])
+
+def build_portfolio_views(data: Dict) -> PortfolioViews:
+    """Compute all derived views and response tables from portfolio data"""
+    general = data.get('general', {})
+    projects = data.get('projects') or []
+    experience = data.get('experience') or []
+
+    skills_summary = summarize_skills(data)
+    featured_project = ""
+    if projects:
+        project = projects[0]
+        featured_project = f"'{project.get('title', 'a web application')}' - {project.get('description', 'a full-stack application')[:100]}..."
+    experience_line = ""
+    if experience:
+        exp = experience[0]
+        experience_line = f"{exp.get('position', 'a developer')} at {exp.get('company', 'various organizations')}. {exp.get('description', 'He has worked on various projects and gained valuable experience.')[:100]}..."
+    contact_email = general.get('email', DEFAULT_EMAIL)
+    contact_line = f"You can contact Suyash at {contact_email} or use the contact form on this website. He's always open to discussing new opportunities and collaborations!"
+
+    templates = {
+        "greeting": GREETING_TEMPLATES,
+        "skills": (
+            f"Suyash is skilled in {', '.join(general.get('specializations', ['Full-Stack Development', 'AI/ML', 'MERN Stack']))}. He has experience with various technologies including React, Node.js, Python, and MongoDB.",
+            "His technical expertise includes full-stack development with the MERN stack, AI/ML integration, and building scalable web applications.",
+            "Suyash specializes in modern web development technologies and has a strong background in both frontend and backend development."
+        ),
+        "projects": (
+            f"Suyash has worked on {len(projects)} projects including web applications, AI integrations, and full-stack solutions.",
+            "His project portfolio includes various web applications built with modern technologies like React, Node.js, and AI integrations.",
+            "You can find detailed information about his projects in the Projects section of this website."
+        ),
+        "experience": (
+            f"Suyash is currently pursuing {general.get('education', {}).get('degree', 'his degree')} and has hands-on experience in software development.",
+            "He has practical experience in full-stack development, team leadership, and has been recognized in various hackathons.",
+            "His experience includes both academic projects and real-world applications in web development and AI."
+        ),
+        "contact": (
+            f"You can reach Suyash at {contact_email} or connect with him on LinkedIn.",
+            "Feel free to use the contact form on this website to get in touch with Suyash directly.",
+            "Suyash is open to new opportunities and collaborations. You can contact him through the contact section."
+        ),
+        "default": DEFAULT_TEMPLATES
+    }
+
+    # Data-specific answers win over the generic templates when the data is there
+    answers = {
+        "greeting": Answer(templates["greeting"], 0.95, ("AI Assistant",)),
+        "skills": Answer(
+            (f"Suyash's technical skills include {skills_summary}. He specializes in full-stack development with modern technologies.",)
+            if skills_summary else templates["skills"],
+            0.9, ("Skills Section",)
+        ),
+        "projects": Answer(
+            (f"Suyash has worked on {len(projects)} projects. One notable project is {featured_project} Visit the Projects section for complete details.",)
+            if projects else templates["projects"],
+            0.9, ("Projects Section",)
+        ),
+        "experience": Answer(
+            (f"Suyash has experience as {experience_line} Check the Resume section for complete details.",)
+            if experience else templates["experience"],
+            0.9, ("Resume Section",)
+        ),
+        "contact": Answer(
+            (contact_line,),
+            0.95, ("Contact Section",)
+        ),
+        "ai": Answer((AI_RESPONSE,), 0.9, ("Skills Section", "Projects Section")),
+        "web_tech": Answer((WEB_TECH_RESPONSE,), 0.9, ("Skills Section",)),
+        "default": Answer(templates["default"], 0.7, ("AI Assistant",))
+    }
+
+    return PortfolioViews(
+        data=data,
+        skills_summary=skills_summary,
+        project_count=len(projects),
+        featured_project=featured_project,
+        experience_line=experience_line,
+        contact_line=contact_line,
+        templates=MappingProxyType(templates),
+        answers=MappingProxyType(answers)
+    )
+
+def load_portfolio_data(data_dir: Optional[str] = None) -> Dict:
+    """Load portfolio data from JSON files"""
+    data = {}
+    data_dir = data_dir or os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+    try:
+        # Load general info
+        with open(os.path.join(data_dir, "general_info.json"), "r") as f:
+            data["general"] = json.load(f)
+
+        # Load projects
+        with open(os.path.join(data_dir, "projects.json"), "r") as f:
+            data["projects"] = json.load(f)
+
+        # Load skills
+        with open(os.path.join(data_dir, "skills.json"), "r") as f:
+            data["skills"] = json.load(f)
+
+        # Load experience
+        with open(os.path.join(data_dir, "experience.json"), "r") as f:
+            data["experience"] = json.load(f)
+
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load portfolio data: {e}")
+        data = {
+            "general": {"name": "Suyash Mishra", "title": "Full-Stack Developer"},
+            "projects": [],
+            "skills": {"technical": {}, "soft": []},
+            "experience": []
+        }
+
+    return data
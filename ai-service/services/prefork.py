@@ -0,0 +1,227 @@
+import os
+import gc
+import time
+import signal
+import socket
+import logging
+import resource
+from typing import Callable, Dict, Optional, Union
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+def get_process_memory(pid: Union[int, str] = "self") -> Dict:
+    """Get memory usage for a process.
+
+    Reads /proc/<pid>/smaps_rollup where available, which splits resident
+    memory into pages shared with the master (copy-on-write) and pages the
+    process owns privately. Falls back to VmRSS, then to ru_maxrss.
+    """
+    memory = {"pid": os.getpid() if pid == "self" else pid}
+
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+        memory["rss_bytes"] = fields.get("Rss", 0)
+        memory["pss_bytes"] = fields.get("Pss", 0)
+        memory["shared_bytes"] = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+        memory["private_bytes"] = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+        return memory
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_bytes"] = int(line.split()[1]) * 1024
+                    return memory
+    except (OSError, ValueError):
+        pass
+
+    if pid == "self":
+        # ru_maxrss is peak RSS in kilobytes on Linux
+        memory["rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return memory
+
+def freeze_heap():
+    """Move every live object into the permanent GC generation.
+
+    Objects created while loading models and the context snapshot are never
+    scanned by the collector afterwards, so the collector does not write to
+    their pages and forked workers keep sharing them copy-on-write.
+    """
+    gc.collect()
+    gc.freeze()
+    logger.info(f"✅ Froze {gc.get_freeze_count()} objects before forking")
+
+class PreforkServer:
+    """Serve an already-loaded ASGI app from forked uvicorn workers.
+
+    The master binds the listening socket and holds the loaded models; each
+    worker inherits both through fork() and runs its own event loop on the
+    shared socket. Worker memory is logged periodically.
+
+    Dead workers are respawned, with an exponential backoff while they keep
+    dying within PREFORK_STABLE_UPTIME of starting. After more than
+    PREFORK_MAX_RAPID_RESTARTS such exits in a row the master stops the
+    remaining workers and exits with status 1 instead of spinning.
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str,
+        port: int,
+        workers: int,
+        post_fork: Optional[Callable[[], None]] = None,
+        on_worker_exit: Optional[Callable[[int], None]] = None,
+        log_level: str = "info"
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.post_fork = post_fork
+        self.on_worker_exit = on_worker_exit  # Called in the master with each reaped worker's pid
+        self.log_level = log_level
+        self.memory_log_interval = float(os.getenv("PREFORK_MEMORY_LOG_INTERVAL", "60"))
+        self.restart_backoff = float(os.getenv("PREFORK_RESTART_BACKOFF", "1.0"))
+        self.max_restart_backoff = float(os.getenv("PREFORK_MAX_RESTART_BACKOFF", "30"))
+        self.max_rapid_restarts = int(os.getenv("PREFORK_MAX_RAPID_RESTARTS", "5"))
+        self.stable_uptime = float(os.getenv("PREFORK_STABLE_UPTIME", "30"))
+        self.children = {}
+        self.respawn_at = []  # Monotonic times at which dead workers are replaced
+        self.rapid_restarts = 0  # Consecutive workers that died before becoming stable
+        self.socket = None
+        self.stopping = False
+        self.crash_looping = False
+
+    def run(self):
+        """Bind, fork workers and supervise them until signalled"""
+        self.socket = self._bind()
+        freeze_heap()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        logger.info(f"🎉 Pre-fork master {os.getpid()} serving on {self.host}:{self.port} with {self.workers} workers")
+        self._log_memory()
+        self._supervise()
+
+        if self.crash_looping:
+            raise SystemExit(1)
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+            os._exit(0)
+        self.children[pid] = time.monotonic()
+
+    def _run_worker(self):
+        # Workers exit on the master's signal through uvicorn's own handlers
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        if self.post_fork:
+            self.post_fork()
+
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        server = uvicorn.Server(config)
+        server.run(sockets=[self.socket])
+
+    def _supervise(self):
+        last_memory_log = time.monotonic()
+
+        while self.children or (self.respawn_at and not self.stopping):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0  # Every worker is dead and waiting out a backoff
+
+            if pid:
+                started_at = self.children.pop(pid, None)
+                if self.on_worker_exit:
+                    try:
+                        self.on_worker_exit(pid)
+                    except Exception as e:
+                        logger.error(f"❌ Worker exit hook failed for {pid}: {e}")
+                if not self.stopping:
+                    self._schedule_respawn(pid, status, started_at)
+                continue
+
+            now = time.monotonic()
+            while self.respawn_at and self.respawn_at[0] <= now and not self.stopping:
+                self.respawn_at.pop(0)
+                self._spawn()
+
+            if self.memory_log_interval > 0 and time.monotonic() - last_memory_log >= self.memory_log_interval:
+                self._log_memory()
+                last_memory_log = time.monotonic()
+
+            time.sleep(0.5)
+
+    def _schedule_respawn(self, pid: int, status: int, started_at: Optional[float]):
+        """Replace a dead worker, backing off while workers keep dying young"""
+        uptime = time.monotonic() - started_at if started_at is not None else 0.0
+        if uptime >= self.stable_uptime:
+            self.rapid_restarts = 0
+        else:
+            self.rapid_restarts += 1
+
+        if self.rapid_restarts > self.max_rapid_restarts:
+            logger.error(
+                f"❌ {self.rapid_restarts} workers in a row exited within {self.stable_uptime:.0f}s "
+                f"of starting (last: {pid}, status {status}), shutting down"
+            )
+            self.crash_looping = True
+            self._handle_stop(signal.SIGTERM, None)
+            return
+
+        delay = 0.0
+        if self.rapid_restarts:
+            delay = min(self.max_restart_backoff, self.restart_backoff * 2 ** (self.rapid_restarts - 1))
+        logger.warning(f"⚠️ Worker {pid} exited with status {status} after {uptime:.1f}s, respawning in {delay:.1f}s")
+        self.respawn_at.append(time.monotonic() + delay)
+        self.respawn_at.sort()
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+    def _log_memory(self):
+        master = get_process_memory()
+        logger.info(f"📊 Master {master['pid']} rss={_megabytes(master.get('rss_bytes'))}")
+        for pid in self.children:
+            worker = get_process_memory(pid)
+            logger.info(
+                f"📊 Worker {pid} rss={_megabytes(worker.get('rss_bytes'))} "
+                f"shared={_megabytes(worker.get('shared_bytes'))} "
+                f"private={_megabytes(worker.get('private_bytes'))}"
+            )
+
+def _megabytes(value: Optional[int]) -> str:
+    return f"{value / (1024 * 1024):.1f}MB" if value is not None else "n/a"
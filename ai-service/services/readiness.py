@@ -0,0 +1,71 @@
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ReadinessTracker:
+    """Track per-component startup state so the service can serve while loading"""
+    
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+    
+    def __init__(self, components: List[str]):
+        self.started_at = time.monotonic()
+        self.components = {
+            name: {"status": self.PENDING, "error": None, "seconds": None}
+            for name in components
+        }
+    
+    def mark_loading(self, name: str):
+        """Mark a component as loading"""
+        self._set(name, self.LOADING)
+    
+    def mark_ready(self, name: str):
+        """Mark a component as ready"""
+        self._set(name, self.READY)
+        logger.info(f"✅ Component ready: {name}")
+    
+    def mark_failed(self, name: str, error: Optional[str] = None):
+        """Mark a component as failed; the service keeps serving degraded paths"""
+        self._set(name, self.FAILED, error)
+        logger.warning(f"⚠️ Component failed: {name} ({error})")
+    
+    def is_ready(self, name: str) -> bool:
+        """Check if a single component is ready"""
+        return self.components.get(name, {}).get("status") == self.READY
+    
+    def all_settled(self) -> bool:
+        """Check if every component has finished loading, successfully or not"""
+        return all(
+            component["status"] in (self.READY, self.FAILED)
+            for component in self.components.values()
+        )
+    
+    def all_ready(self) -> bool:
+        """Check if every component is ready"""
+        return all(
+            component["status"] == self.READY
+            for component in self.components.values()
+        )
+    
+    def get_status(self) -> Dict[str, str]:
+        """Get component name to status mapping"""
+        return {name: component["status"] for name, component in self.components.items()}
+    
+    def get_details(self) -> Dict:
+        """Get detailed readiness information"""
+        return {
+            "ready": self.all_ready(),
+            "uptime_seconds": round(time.monotonic() - self.started_at, 2),
+            "components": {name: dict(component) for name, component in self.components.items()}
+        }
+    
+    def _set(self, name: str, status: str, error: Optional[str] = None):
+        component = self.components.setdefault(name, {"status": self.PENDING, "error": None, "seconds": None})
+        component["status"] = status
+        component["error"] = error
+        if status in (self.READY, self.FAILED):
+            component["seconds"] = round(time.monotonic() - self.started_at, 2)
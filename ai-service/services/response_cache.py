@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def default_cache_path() -> str:
+    """Get the shared cache database path (empty RESPONSE_CACHE_DB disables it)"""
+    return os.getenv(
+        "RESPONSE_CACHE_DB",
+        os.path.join(os.path.dirname(__file__), "..", "data", "response_cache.db")
+    )
+
+class ResponseCache:
+    """Two-level response cache shared across worker processes and restarts.
+
+    Keys are content-stable blake2b digests, so every process computes the
+    same key for the same question. Lookups go to an in-process LRU (L1)
+    first and then to a SQLite database in WAL mode (L2) that all workers on
+    the host read and write concurrently.
+
+    The event loop never touches SQLite: L2 reads run in the executor, and
+    writes land in L1 and a pending batch that run_maintenance flushes in
+    the executor. The same task prunes rows older than the TTL and the
+    oldest rows beyond RESPONSE_CACHE_MAX_ROWS, so the file stays bounded.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        l1_size: int = 200,
+        ttl_seconds: Optional[float] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.db_path = default_cache_path() if db_path is None else db_path
+        self.l1_size = l1_size
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("RESPONSE_CACHE_TTL", "86400")
+        )
+        self.max_rows = max_rows if max_rows is not None else int(
+            os.getenv("RESPONSE_CACHE_MAX_ROWS", "50000")
+        )
+        self.flush_interval = float(os.getenv("RESPONSE_CACHE_FLUSH_INTERVAL", "1.0"))
+        self.prune_interval = float(os.getenv("RESPONSE_CACHE_PRUNE_INTERVAL", "300"))
+        self.l1 = OrderedDict()
+        self.pending: Dict[str, Tuple[str, str, float]] = {}  # Key -> row awaiting the next flush
+        self.stats = {
+            "l1_hits": 0, "l2_hits": 0, "misses": 0, "l2_errors": 0,
+            "rows_written": 0, "rows_pruned": 0
+        }
+        self._lock = threading.Lock()  # Executor threads share the connection
+        self._connection = None
+        self._connection_pid = None
+
+    @staticmethod
+    def make_key(message: str, context_ids: Iterable[str], version: str) -> str:
+        """Build a stable cache key from the normalized message, context ids and model/prompt version"""
+        normalized = " ".join(message.lower().split())
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(version.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalized.encode("utf-8"))
+        for context_id in sorted(context_ids):
+            digest.update(b"\x00")
+            digest.update(context_id.encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """Get a cached response, reading L2 in the executor on an L1 miss"""
+        value = self.l1.get(key)
+        if value is not None:
+            self.l1.move_to_end(key)
+            self.stats["l1_hits"] += 1
+            metrics.increment("ai_cache_requests_total", cache="response", result="l1_hit")
+            return value
+
+        value = None
+        if key in self.pending:
+            # Written recently, evicted from L1 and not flushed yet
+            value = json.loads(self.pending[key][1])
+        elif self.db_path:
+            value = await asyncio.get_running_loop().run_in_executor(None, self._get_l2, key)
+        if value is not None:
+            self._set_l1(key, value)
+            self.stats["l2_hits"] += 1
+            metrics.increment("ai_cache_requests_total", cache="response", result="l2_hit")
+            return value
+
+        self.stats["misses"] += 1
+        metrics.increment("ai_cache_requests_total", cache="response", result="miss")
+        return None
+
+    def set(self, key: str, value: Dict):
+        """Cache a response in L1 now and in L2 with the next flush"""
+        self._set_l1(key, value)
+        if self.db_path:
+            self.pending[key] = (key, json.dumps(value), time.time())
+
+    def clear(self):
+        """Clear both cache levels (blocking; admin use)"""
+        self.l1.clear()
+        self.pending.clear()
+
+        with self._lock:
+            connection = self._get_connection()
+            if connection is not None:
+                try:
+                    connection.execute("DELETE FROM response_cache")
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache clear failed: {e}")
+
+    async def run_maintenance(self):
+        """Background task flushing pending writes and pruning L2 periodically"""
+        if not self.db_path:
+            return
+
+        loop = asyncio.get_running_loop()
+        last_prune = 0.0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            rows, self.pending = list(self.pending.values()), {}
+            prune = time.monotonic() - last_prune >= self.prune_interval
+            if not rows and not prune:
+                continue
+            try:
+                await loop.run_in_executor(None, self._write_l2, rows, prune)
+            except Exception as e:
+                # Cached answers can be regenerated, so a failed batch is dropped
+                self.stats["l2_errors"] += 1
+                logger.warning(f"Response cache flush failed: {e}")
+            if prune:
+                last_prune = time.monotonic()
+
+    def flush(self):
+        """Write pending rows synchronously (used on shutdown and before forking)"""
+        rows, self.pending = list(self.pending.values()), {}
+        if not rows:
+            return
+        try:
+            self._write_l2(rows, prune=False)
+        except Exception as e:
+            logger.warning(f"Response cache flush failed: {e}")
+
+    def close(self):
+        """Flush and close this process's connection.
+
+        The pre-fork master calls this before forking, so no worker inherits
+        an open SQLite connection; workers open their own on first use.
+        """
+        self.flush()
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "l1_size": len(self.l1),
+            "pending_writes": len(self.pending),
+            "max_rows": self.max_rows,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "shared_backend": self.db_path or None
+        }
+
+    def _set_l1(self, key: str, value: Dict):
+        self.l1[key] = value
+        self.l1.move_to_end(key)
+        while len(self.l1) > self.l1_size:
+            self.l1.popitem(last=False)
+
+    def _get_l2(self, key: str) -> Optional[Dict]:
+        """Read one row (blocking; runs in the executor)"""
+        try:
+            with self._lock:
+                connection = self._get_connection()
+                if connection is None:
+                    return None
+                row = connection.execute(
+                    "SELECT value, created_at FROM response_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            self.stats["l2_errors"] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+        if row is None:
+            return None
+        if self.ttl_seconds > 0 and time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def _write_l2(self, rows: List[Tuple[str, str, float]], prune: bool):
+        """Write a batch in one transaction, then optionally prune (blocking)"""
+        with self._lock:
+            connection = self._get_connection()
+            if connection is None:
+                return
+            if rows:
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO response_cache (key, value, created_at) VALUES (?, ?, ?)",
+                        rows
+                    )
+                self.stats["rows_written"] += len(rows)
+            if prune:
+                self.stats["rows_pruned"] += self._prune(connection)
+
+    def _prune(self, connection: sqlite3.Connection) -> int:
+        """Delete expired rows, then the oldest rows beyond the row cap"""
+        pruned = 0
+        if self.ttl_seconds > 0:
+            pruned += connection.execute(
+                "DELETE FROM response_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+        if self.max_rows > 0:
+            pruned += connection.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            ).rowcount
+        return pruned
+
+    def _get_connection(self) -> Optional[sqlite3.Connection]:
+        """Open the shared database lazily, once per process (call with the lock held).
+
+        Connections must not cross fork(), so a pre-forked worker opens its
+        own on first use.
+        """
+        if not self.db_path:
+            return None
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=1.0,
+                isolation_level=None,  # Autocommit unless a batch opens a transaction
+                check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS response_cache_created_at ON response_cache (created_at)"
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"⚠️ Shared response cache unavailable, using in-process cache only: {e}")
+            self.db_path = ""
+            return None
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
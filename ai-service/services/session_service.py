@@ -1,152 +1,632 @@
+import os
+import sys
 import time
 import uuid
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+
+from services.histogram import LogHistogram
+from services.session_store import (
+    SessionRow,
+    SessionStore,
+    create_session_store,
+    decode_messages,
+    encode_messages
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSION_MESSAGES = 20  # Message exchanges kept per session
+
+class SessionMessage(NamedTuple):
+    timestamp: float
+    user_message: str
+    ai_response: str
+    confidence: Optional[float] = None
+    
+    def to_dict(self) -> Dict:
+        data = {
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "user_message": self.user_message,
+            "ai_response": self.ai_response
+        }
+        if self.confidence is not None:
+            data["confidence"] = self.confidence
+        return data
+    
+    def estimated_bytes(self) -> int:
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.timestamp)
+            + sys.getsizeof(self.user_message)
+            + sys.getsizeof(self.ai_response)
+        )
+
+class SessionRecord:
+    """Compact per-session state.
+    
+    Timestamps are floats (wall-clock for display, monotonic for expiry) and
+    the history is a bounded deque of tuples, which is a fraction of the
+    size of the dict-of-dicts it replaces.
+    """
+    
+    __slots__ = (
+        "id", "user_ip", "created_at", "last_activity", "last_seen",
+        "messages", "size", "seq", "revision", "retrieval_memo"
+    )
+    
+    def __init__(self, session_id: str, user_ip: Optional[str] = None):
+        now = time.time()
+        self.id = session_id
+        self.user_ip = user_ip
+        self.created_at = now
+        self.last_activity = now
+        self.last_seen = time.monotonic()
+        self.messages = deque(maxlen=MAX_SESSION_MESSAGES)
+        self.seq = 0  # Position in SessionService's export order, assigned when cached
+        self.revision = 0  # Store revision this copy was loaded from or last written as
+        self.retrieval_memo = None  # Last retrieval, for follow-ups (in memory only)
+        self.size = self._base_bytes()
+    
+    def _base_bytes(self) -> int:
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.id)
+            + sys.getsizeof(self.user_ip)
+            + sys.getsizeof(self.messages)
+            + 3 * sys.getsizeof(self.created_at)
+            + sys.getsizeof(self.seq)
+            + sys.getsizeof(self.revision)
+        )
+    
+    @classmethod
+    def from_row(cls, row: SessionRow) -> "SessionRecord":
+        """Rebuild a record loaded from a session store"""
+        session_id, user_ip, created_at, last_activity, messages, revision = row
+        session = cls(session_id, user_ip)
+        session.created_at = created_at
+        session.last_activity = last_activity
+        session.revision = revision
+        # Map wall-clock idle time onto the monotonic clock used for expiry
+        session.last_seen = time.monotonic() - max(0.0, time.time() - last_activity)
+        for message in decode_messages(messages):
+            session._append(SessionMessage(*message))
+        return session
+    
+    def to_row(self) -> SessionRow:
+        """Serialize the record for a session store"""
+        return (
+            self.id, self.user_ip, self.created_at, self.last_activity,
+            encode_messages(self.messages), self.revision
+        )
+    
+    def add_message(self, user_message: str, ai_response: str, confidence: Optional[float] = None):
+        """Append an exchange"""
+        now = time.time()
+        self.last_activity = now
+        self.last_seen = time.monotonic()
+        self._append(SessionMessage(now, user_message, ai_response, confidence))
+    
+    def _append(self, message: SessionMessage):
+        delta = message.estimated_bytes()
+        if len(self.messages) == self.messages.maxlen:
+            # The deque drops the oldest exchange on append
+            delta -= self.messages[0].estimated_bytes()
+        self.messages.append(message)
+        self.size += delta
+    
+    def merge(self, other: "SessionRecord") -> bool:
+        """Fold in exchanges another worker recorded for this session.
+        
+        Both histories are combined in timestamp order (the deque keeps the
+        most recent) and the later activity wins. Returns whether anything
+        was added; if so the retrieval memo no longer follows the last turn
+        and is dropped.
+        """
+        self.revision = max(self.revision, other.revision)
+        known = set(self.messages)
+        added = [message for message in other.messages if message not in known]
+        if not added:
+            return False
+        
+        messages = sorted(itertools.chain(self.messages, added), key=lambda message: message.timestamp)
+        self.set_retrieval_memo(None)
+        self.messages.clear()
+        self.size = self._base_bytes()
+        for message in messages:
+            self._append(message)
+        
+        self.created_at = min(self.created_at, other.created_at)
+        if other.last_activity > self.last_activity:
+            self.last_activity = other.last_activity
+            self.last_seen = other.last_seen
+        return True
+    
+    def set_retrieval_memo(self, memo: Optional[tuple]):
+        """Replace the retrieval memo, keeping the size estimate current"""
+        self.size += self._memo_bytes(memo) - self._memo_bytes(self.retrieval_memo)
+        self.retrieval_memo = memo
+    
+    @staticmethod
+    def _memo_bytes(memo: Optional[tuple]) -> int:
+        if memo is None:
+            return 0
+        return sys.getsizeof(memo) + sum(sys.getsizeof(field) for field in memo)
+    
+    def duration(self) -> float:
+        """Seconds between creation and last activity"""
+        return self.last_activity - self.created_at
+    
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "user_ip": self.user_ip,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "last_activity": datetime.fromtimestamp(self.last_activity).isoformat(),
+            "message_count": len(self.messages),
+            "messages": [message.to_dict() for message in self.messages]
+        }
+
+def merge_rows(stored: SessionRow, local: SessionRow) -> SessionRow:
+    """Combine a stored row another worker wrote with this worker's copy"""
+    session = SessionRecord.from_row(local)
+    session.merge(SessionRecord.from_row(stored))
+    return session.to_row()
 
 class SessionService:
-    def __init__(self):
-        self.sessions = {}
+    """Session state with an in-memory LRU in front of a pluggable store.
+    
+    Writes only mark a session dirty; a background task coalesces them and
+    flushes them to the store in batches, so requests never wait on disk.
+    With a durable store, fetch_session reads the store (in the executor)
+    only when a session is not cached, and flushes merge rather than
+    overwrite rows that another worker changed since they were read.
+    """
+    
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store or create_session_store()
+        # Ordered by last activity (least recent first), so the oldest
+        # sessions are always at the front and expire first
+        self.sessions = OrderedDict()
         self.session_timeout = 3600  # 1 hour in seconds
+        self.cleanup_interval = 60  # Seconds between background expiry sweeps
         
-    def create_session(self, user_ip: Optional[str] = None) -> str:
-        """Create a new session"""
-        session_id = f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
-        
-        self.sessions[session_id] = {
-            "id": session_id,
-            "user_ip": user_ip,
-            "created_at": datetime.now(),
-            "last_activity": datetime.now(),
-            "messages": [],
-            "context": {}
-        }
+        # Aggregates over the sessions in memory, adjusted as sessions enter,
+        # change and leave so that statistics never iterate the sessions
+        self.estimated_bytes = 0  # Approximate memory held by session records
+        self.live_messages = 0
+        self.live_duration = 0.0
         
-        # Clean up old sessions
-        self._cleanup_old_sessions()
+        # Lifetime counters, and durations of sessions that ended
+        self.counters = {"created": 0, "expired": 0, "deleted": 0, "evicted": 0, "evicted_per_ip": 0}
+        self.duration_histogram = LogHistogram(start=1.0, factor=2.0, buckets=14)
+        
+        # Hard limits: least recently used sessions are evicted once the
+        # estimated bytes exceed the budget or one IP holds too many sessions
+        self.memory_budget = int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", "64")) * 1024 * 1024)
+        self.max_sessions_per_ip = int(os.getenv("SESSION_MAX_PER_IP", "50"))
+        self.sessions_by_ip: Dict[str, OrderedDict] = {}
+        
+        # Write-behind state: dirty records are kept here until flushed, so
+        # evicting them from the LRU does not lose writes
+        self.cache_size = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+        self.flush_interval = float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0"))
+        self.pending_writes: Dict[str, SessionRecord] = {}
+        self.pending_deletes = set()
+        
+        # Every cached session gets the next sequence number, so exports from
+        # memory can walk sessions in creation order while requests change them
+        self.last_seq = 0
+        self.sessions_by_seq: Dict[int, SessionRecord] = {}
+        self.store_stats = {"flushes": 0, "rows_written": 0, "rows_deleted": 0, "loads": 0, "merges": 0, "flush_errors": 0}
+    
+    def create_session(self, user_ip: Optional[str] = None, session_id: Optional[str] = None) -> str:
+        """Create a new session, optionally under a caller-supplied ID"""
+        session_id = session_id or f"session_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        
+        session = SessionRecord(session_id, user_ip)
+        self._cache(session)
+        self._mark_dirty(session)
+        self.counters["created"] += 1
         
         return session_id
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session by ID"""
+    def get_session(self, session_id: str) -> Optional[SessionRecord]:
+        """Get a session this process holds by ID, without touching the store"""
         session = self.sessions.get(session_id)
+        if session is None:
+            # Dirty sessions evicted from the LRU are still pending a flush
+            session = self.pending_writes.get(session_id)
+            if session is not None:
+                self._cache(session)
         
-        if session:
-            # Check if session is expired
-            if self._is_session_expired(session):
-                del self.sessions[session_id]
-                return None
-            
+        return self._unless_expired(session)
+    
+    async def fetch_session(self, session_id: str) -> Optional[SessionRecord]:
+        """Get a session by ID, loading it from the store on a cache miss.
+        
+        Request handlers use this rather than get_session. A cached copy is
+        served as is, even if another worker wrote the session since: the
+        flush compares revisions and merges the two rows instead of
+        overwriting. Only a miss reads the store, in the executor.
+        """
+        session = self.get_session(session_id)
+        if session is not None or not self.store.durable or session_id in self.pending_deletes:
             return session
         
-        return None
-    
-    def update_session(self, session_id: str, user_message: str, ai_response: str):
-        """Update session with new message exchange"""
+        try:
+            row = await asyncio.get_running_loop().run_in_executor(None, self.store.load, session_id)
+        except Exception as e:
+            logger.error(f"Session store read error: {e}")
+            return None
+        if row is None:
+            return None
+        self.store_stats["loads"] += 1
+        
+        # Requests may have created or deleted the session during the read
+        if session_id in self.pending_deletes:
+            return None
         session = self.get_session(session_id)
+        if session is None:
+            session = SessionRecord.from_row(row)
+            self._cache(session)
+            return self._unless_expired(session)
+        
+        self._account(session, -1)
+        session.merge(SessionRecord.from_row(row))
+        self._account(session, 1)
+        return self._unless_expired(session)
+    
+    def update_session(
+        self,
+        session_id: str,
+        user_message: str,
+        ai_response: str,
+        confidence: Optional[float] = None,
+        session: Optional[SessionRecord] = None
+    ):
+        """Update session with new message exchange.
+        
+        Callers may pass the record they fetched: with a durable store the
+        LRU can evict it while the answer is generated, and it is cached
+        again rather than losing the exchange.
+        """
+        cached = self.get_session(session_id)
+        if cached is None and session is not None and self.store.durable and session_id not in self.pending_deletes:
+            self._cache(session)
+            cached = session
+        session = cached
         
         if session:
-            session["last_activity"] = datetime.now()
-            session["messages"].append({
-                "timestamp": datetime.now().isoformat(),
-                "user_message": user_message,
-                "ai_response": ai_response
-            })
-            
-            # Limit message history to last 20 exchanges
-            if len(session["messages"]) > 20:
-                session["messages"] = session["messages"][-20:]
+            # History is bounded by the deque's maxlen
+            self._account(session, -1)
+            session.add_message(user_message, ai_response, confidence)
+            self._account(session, 1)
+            self._touch(session)
+            self._enforce_budget()
+            self._mark_dirty(session)
+    
+    def set_retrieval_memo(self, session_id: str, memo: Optional[tuple]):
+        """Remember a session's last retrieval for its next turn"""
+        session = self.sessions.get(session_id)
+        
+        if session:
+            self._account(session, -1)
+            session.set_retrieval_memo(memo)
+            self._account(session, 1)
+            self._enforce_budget()
     
     def get_session_history(self, session_id: str) -> List[Dict]:
         """Get message history for a session"""
         session = self.get_session(session_id)
-        return session["messages"] if session else []
+        return [message.to_dict() for message in session.messages] if session else []
     
     def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        if self.get_session(session_id):
+            self._remove(session_id, "deleted")
+            if self.store.durable:
+                self.pending_deletes.add(session_id)
             return True
         return False
     
     def get_active_sessions(self) -> int:
-        """Get count of active sessions"""
-        active_count = 0
-        current_time = datetime.now()
-        
-        for session in self.sessions.values():
-            if not self._is_session_expired(session):
-                active_count += 1
-        
-        return active_count
+        """Get count of sessions cached by this worker (get_totals covers the service)"""
+        return len(self.sessions)
     
     def get_total_sessions(self) -> int:
-        """Get total number of sessions"""
-        return len(self.sessions)
+        """Get number of sessions this worker created since startup"""
+        return self.counters["created"]
     
     def get_total_messages(self) -> int:
-        """Get total number of messages across all sessions"""
-        total = 0
-        for session in self.sessions.values():
-            total += len(session["messages"])
-        return total
+        """Get number of messages in sessions cached by this worker"""
+        return self.live_messages
+    
+    async def get_totals(self) -> Tuple[int, int, float]:
+        """(active sessions, messages, summed duration) across the whole service.
+        
+        A durable store holds every worker's sessions (the LRU only a
+        subset of one worker's) and keeps running totals of them, so this
+        reads one row in the executor without flushing: writes still pending
+        in any worker, and sessions that expired since the last cleanup
+        sweep, show up within SESSION_FLUSH_INTERVAL and cleanup_interval.
+        Otherwise the sessions in memory are all there is, and the running
+        aggregates answer in constant time.
+        """
+        if not self.store.durable:
+            return len(self.sessions), self.live_messages, self.live_duration
+        
+        return await asyncio.get_running_loop().run_in_executor(None, self.store.summarize)
+    
+    def get_memory_stats(self) -> Dict:
+        """Get estimated memory held by session records"""
+        count = len(self.sessions)
+        return {
+            "estimated_bytes": self.estimated_bytes,
+            "estimated_bytes_per_session": round(self.estimated_bytes / count, 1) if count else 0,
+            "memory_budget_bytes": self.memory_budget,
+            "budget_used": round(self.estimated_bytes / self.memory_budget, 4) if self.memory_budget else 0,
+            "tracked_ips": len(self.sessions_by_ip),
+            "evicted_sessions": self.counters["evicted"],
+            "evicted_sessions_per_ip": self.counters["evicted_per_ip"]
+        }
+    
+    def get_store_stats(self) -> Dict:
+        """Get session store backend and write-behind statistics"""
+        return {
+            "backend": self.store.name,
+            "cached_sessions": len(self.sessions),
+            "pending_writes": len(self.pending_writes),
+            "pending_deletes": len(self.pending_deletes),
+            **self.store_stats
+        }
+    
+    def _account(self, session: SessionRecord, sign: int):
+        """Add (sign=1) or subtract (sign=-1) a session's share of the aggregates"""
+        self.estimated_bytes += sign * session.size
+        self.live_messages += sign * len(session.messages)
+        self.live_duration += sign * session.duration()
+    
+    def _cache(self, session: SessionRecord):
+        """Put a session at the recent end of the LRU, evicting to stay within limits"""
+        self.sessions[session.id] = session
+        self._account(session, 1)
+        self.last_seq += 1
+        session.seq = self.last_seq
+        self.sessions_by_seq[session.seq] = session
+        
+        if session.user_ip:
+            ip_sessions = self.sessions_by_ip.setdefault(session.user_ip, OrderedDict())
+            ip_sessions[session.id] = None
+            while len(ip_sessions) > self.max_sessions_per_ip:
+                self._evict(next(iter(ip_sessions)))
+                self.counters["evicted_per_ip"] += 1
+        
+        self._enforce_budget()
+    
+    def _enforce_budget(self):
+        """Evict least recently used sessions while over the memory budget or cache size"""
+        # The most recent session is never evicted, so the caller's stays
+        while len(self.sessions) > 1 and (
+            self.estimated_bytes > self.memory_budget
+            or (self.store.durable and len(self.sessions) > self.cache_size)
+        ):
+            self._evict(next(iter(self.sessions)))
+    
+    def _evict(self, session_id: str):
+        """Drop a session from memory to make room"""
+        if not self.store.durable:
+            self._remove(session_id, "evicted")
+            return
+        
+        # A durable store keeps the session (dirty ones are still pending), so
+        # only the cached copy goes and a later request loads it back
+        session = self.sessions.pop(session_id)
+        self._untrack(session)
+        self.counters["evicted"] += 1
+    
+    def _touch(self, session: SessionRecord):
+        """Move a cached session to the recent end of the LRU"""
+        self.sessions.move_to_end(session.id)
+        if session.user_ip:
+            self.sessions_by_ip[session.user_ip].move_to_end(session.id)
+    
+    def _untrack(self, session: SessionRecord):
+        """Remove a session leaving memory from the aggregates and indexes"""
+        self._account(session, -1)
+        self.sessions_by_seq.pop(session.seq, None)
+        
+        if session.user_ip:
+            ip_sessions = self.sessions_by_ip[session.user_ip]
+            ip_sessions.pop(session.id, None)
+            if not ip_sessions:
+                del self.sessions_by_ip[session.user_ip]
     
-    def _is_session_expired(self, session: Dict) -> bool:
+    def _mark_dirty(self, session: SessionRecord):
+        if self.store.durable:
+            self.pending_writes[session.id] = session
+            self.pending_deletes.discard(session.id)
+    
+    def _remove(self, session_id: str, reason: str):
+        """Drop a session that ended, recording why and how long it lasted"""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._untrack(session)
+            self.counters[reason] += 1
+            self.duration_histogram.observe(session.duration())
+        self.pending_writes.pop(session_id, None)
+    
+    def _unless_expired(self, session: Optional[SessionRecord]) -> Optional[SessionRecord]:
+        """Return a cached session, or None after removing it if it expired"""
+        if session is not None and self._is_session_expired(session):
+            self._remove(session.id, "expired")
+            return None
+        return session
+    
+    def _is_session_expired(self, session: SessionRecord, now: Optional[float] = None) -> bool:
         """Check if a session is expired"""
-        last_activity = session["last_activity"]
-        return (datetime.now() - last_activity).seconds > self.session_timeout
+        now = time.monotonic() if now is None else now
+        return now - session.last_seen > self.session_timeout
     
-    def _cleanup_old_sessions(self):
-        """Remove expired sessions"""
-        expired_sessions = []
+    def _cleanup_old_sessions(self) -> int:
+        """Remove expired sessions.
         
-        for session_id, session in self.sessions.items():
-            if self._is_session_expired(session):
-                expired_sessions.append(session_id)
+        Sessions are kept in last-activity order, so expired ones sit at the
+        front: each call pops only what has expired, amortized O(1).
+        """
+        now = time.monotonic()
+        removed = 0
         
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if not self._is_session_expired(session, now):
+                break
+            self._remove(session_id, "expired")
+            removed += 1
+        
+        return removed
+    
+    async def run_cleanup(self):
+        """Expire sessions periodically in the background instead of inline"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                removed = self._cleanup_old_sessions()
+                if self.store.durable:
+                    removed += await loop.run_in_executor(
+                        None, self.store.delete_expired, time.time() - self.session_timeout
+                    )
+                if removed:
+                    logger.info(f"Expired {removed} sessions")
+            except Exception as e:
+                logger.error(f"Session cleanup error: {e}")
     
-    def get_session_stats(self) -> Dict:
-        """Get session statistics"""
-        self._cleanup_old_sessions()
+    async def run_flush(self):
+        """Flush coalesced session writes to the store in the background"""
+        if not self.store.durable:
+            return
         
-        total_sessions = len(self.sessions)
-        active_sessions = self.get_active_sessions()
-        total_messages = self.get_total_messages()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_pending()
+    
+    async def _flush_pending(self):
+        """Write the pending changes in the executor, requeueing them on failure"""
+        writes, deletes = self._take_pending()
+        if not writes and not deletes:
+            return
+        # Rows are serialized on the event loop so the executor never
+        # iterates a deque that a request is appending to
+        rows = [session.to_row() for session in writes.values()]
+        try:
+            written = await asyncio.get_running_loop().run_in_executor(None, self._write_batch, rows, deletes)
+        except Exception as e:
+            self.store_stats["flush_errors"] += 1
+            logger.error(f"Session store flush error: {e}")
+            self._requeue(writes, deletes)
+            return
+        self._adopt_written(rows, written)
+    
+    def flush(self):
+        """Write all pending session changes synchronously (used on shutdown)"""
+        if not self.store.durable:
+            return
+        writes, deletes = self._take_pending()
+        try:
+            self._write_batch([session.to_row() for session in writes.values()], deletes)
+        except Exception as e:
+            logger.error(f"Session store flush error: {e}")
+    
+    def _take_pending(self):
+        writes, deletes = self.pending_writes, list(self.pending_deletes)
+        self.pending_writes = {}
+        self.pending_deletes.clear()
+        return writes, deletes
+    
+    def _requeue(self, writes: Dict[str, SessionRecord], deletes: List[str]):
+        """Retry a failed batch on the next flush, unless newer changes superseded it"""
+        for session_id, session in writes.items():
+            if session_id not in self.pending_deletes:
+                self.pending_writes.setdefault(session_id, session)
+        for session_id in deletes:
+            if session_id not in self.pending_writes:
+                self.pending_deletes.add(session_id)
+    
+    def _write_batch(self, rows: List[SessionRow], deletes: List[str]) -> List[SessionRow]:
+        written = self.store.save_many(rows, merge=merge_rows) if rows else []
+        if deletes:
+            self.store.delete_many(deletes)
         
-        # Calculate average messages per session
-        avg_messages = total_messages / total_sessions if total_sessions > 0 else 0
+        self.store_stats["flushes"] += 1
+        self.store_stats["rows_written"] += len(rows)
+        self.store_stats["rows_deleted"] += len(deletes)
+        return written
+    
+    def _adopt_written(self, rows: List[SessionRow], written: List[SessionRow]):
+        """Give cached copies their new revisions, merging rows the store merged"""
+        for row, written_row in zip(rows, written):
+            session = self.sessions.get(row[0]) or self.pending_writes.get(row[0])
+            if session is None:
+                continue
+            if written_row[4] is row[4]:
+                session.revision = max(session.revision, written_row[5])
+                continue
+            self.store_stats["merges"] += 1
+            # Only cached sessions count towards the aggregates
+            cached = session.id in self.sessions
+            if cached:
+                self._account(session, -1)
+            session.merge(SessionRecord.from_row(written_row))
+            if cached:
+                self._account(session, 1)
+    
+    async def get_session_stats(self) -> Dict:
+        """Get session statistics.
         
-        # Get session duration statistics
-        durations = []
-        for session in self.sessions.values():
-            if not self._is_session_expired(session):
-                duration = (session["last_activity"] - session["created_at"]).seconds
-                durations.append(duration)
+        The top-level totals cover the service (see get_totals) and "scope"
+        says where they came from; everything under "worker", like the
+        lifetime counters and cache figures, is this worker's alone.
+        """
+        active_sessions, total_messages, total_duration = await self.get_totals()
         
-        avg_duration = sum(durations) / len(durations) if durations else 0
+        avg_messages = total_messages / active_sessions if active_sessions else 0
+        avg_duration = total_duration / active_sessions if active_sessions else 0
         
         return {
-            "total_sessions": total_sessions,
+            "scope": "store" if self.store.durable else "process",
             "active_sessions": active_sessions,
             "total_messages": total_messages,
             "average_messages_per_session": round(avg_messages, 2),
-            "average_session_duration_seconds": round(avg_duration, 2)
+            "average_session_duration_seconds": round(avg_duration, 2),
+            "worker": {
+                "pid": os.getpid(),
+                "created_sessions": self.counters["created"],
+                "expired_sessions": self.counters["expired"],
+                "deleted_sessions": self.counters["deleted"],
+                "cached_sessions": len(self.sessions),
+                "cached_messages": self.live_messages,
+                "ended_session_durations_seconds": self.duration_histogram.to_dict()
+            },
+            "store": self.get_store_stats(),
+            **self.get_memory_stats()
         }
     
     def get_recent_sessions(self, limit: int = 10) -> List[Dict]:
         """Get recent sessions"""
-        sessions = list(self.sessions.values())
-        sessions.sort(key=lambda x: x["last_activity"], reverse=True)
-        
         recent = []
-        for session in sessions[:limit]:
+        for session_id in list(itertools.islice(reversed(self.sessions), limit)):
+            session = self.sessions[session_id]
             recent.append({
-                "id": session["id"],
-                "created_at": session["created_at"].isoformat(),
-                "last_activity": session["last_activity"].isoformat(),
-                "message_count": len(session["messages"]),
-                "user_ip": session.get("user_ip", "unknown")
+                "id": session.id,
+                "created_at": datetime.fromtimestamp(session.created_at).isoformat(),
+                "last_activity": datetime.fromtimestamp(session.last_activity).isoformat(),
+                "message_count": len(session.messages),
+                "user_ip": session.user_ip or "unknown"
             })
         
         return recent
@@ -154,23 +634,104 @@ class SessionService:
     def clear_all_sessions(self):
         """Clear all sessions (admin function)"""
         self.sessions.clear()
+        self.sessions_by_seq.clear()
+        self.sessions_by_ip.clear()
+        self.pending_writes.clear()
+        self.pending_deletes.clear()
+        self.estimated_bytes = 0
+        self.live_messages = 0
+        self.live_duration = 0.0
+        self.store.clear()
+    
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+        """Parse an export cursor ("<created_at>:<session id>"); raises ValueError if malformed"""
+        if not cursor:
+            return None
+        created_at, separator, session_id = cursor.partition(":")
+        if not separator or not session_id:
+            raise ValueError(f"Invalid export cursor: {cursor}")
+        return float(created_at), session_id
+    
+    @staticmethod
+    def format_cursor(session: SessionRecord) -> str:
+        return f"{session.created_at!r}:{session.id}"
+    
+    async def iter_sessions(
+        self,
+        after: Optional[Tuple[float, str]] = None,
+        since: Optional[float] = None,
+        min_messages: int = 0,
+        page_size: int = 100
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield (cursor, session data) for sessions created after a cursor, oldest first.
+        
+        Cursors are the session's (created_at, id), which never changes, so an
+        export resumes in the right place on any worker and after restarts.
+        With a durable store, sessions are paged from the store in the
+        executor (after flushing this worker's pending writes) and cover every
+        worker's sessions; otherwise this process's sessions are walked by
+        sequence number, so nothing is copied up front while requests keep
+        changing them.
+        """
+        if self.store.durable:
+            sessions = self._iter_stored_sessions(after, since, page_size)
+        else:
+            sessions = self._iter_cached_sessions(after, since)
+        
+        async for session in sessions:
+            if len(session.messages) < min_messages:
+                continue
+            session_data = session.to_dict()
+            session_data.pop("user_ip")
+            yield self.format_cursor(session), session_data
     
-    def export_sessions(self) -> Dict:
+    async def _iter_stored_sessions(
+        self,
+        after: Optional[Tuple[float, str]],
+        since: Optional[float],
+        page_size: int
+    ) -> AsyncIterator[SessionRecord]:
+        await self._flush_pending()
+        loop = asyncio.get_running_loop()
+        active_since = time.time() - self.session_timeout
+        if since is not None:
+            active_since = max(active_since, since)
+        
+        while True:
+            rows = await loop.run_in_executor(None, self.store.load_page, after, active_since, page_size)
+            for row in rows:
+                yield SessionRecord.from_row(row)
+            if len(rows) < page_size:
+                return
+            after = (rows[-1][2], rows[-1][0])
+    
+    async def _iter_cached_sessions(
+        self,
+        after: Optional[Tuple[float, str]],
+        since: Optional[float]
+    ) -> AsyncIterator[SessionRecord]:
+        end = self.last_seq
+        now = time.monotonic()
+        # Sequence numbers are inserted in increasing order, so the first key
+        # is the oldest live session and the long tail of ended ones is skipped
+        start = next(iter(self.sessions_by_seq), end + 1)
+        
+        for seq in range(start, end + 1):
+            session = self.sessions_by_seq.get(seq)
+            if session is None or self._is_session_expired(session, now):
+                continue
+            if after is not None and (session.created_at, session.id) <= after:
+                continue
+            if since is not None and session.last_activity < since:
+                continue
+            yield session
+    
+    async def export_sessions(self) -> Dict:
         """Export all sessions for backup/analysis"""
-        export_data = {
+        sessions = [session_data async for _, session_data in self.iter_sessions()]
+        return {
             "export_timestamp": datetime.now().isoformat(),
-            "total_sessions": len(self.sessions),
-            "sessions": []
+            "total_sessions": len(sessions),
+            "sessions": sessions
         }
-        
-        for session in self.sessions.values():
-            session_data = {
-                "id": session["id"],
-                "created_at": session["created_at"].isoformat(),
-                "last_activity": session["last_activity"].isoformat(),
-                "message_count": len(session["messages"]),
-                "messages": session["messages"]
-            }
-            export_data["sessions"].append(session_data)
-        
-        return export_data
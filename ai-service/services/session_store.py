@@ -0,0 +1,276 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (id, user_ip, created_at, last_activity, messages_json, revision)
+SessionRow = Tuple[str, Optional[str], float, float, str, int]
+
+# Combines (stored row, local row) when another worker wrote the session since it was read
+RowMerge = Callable[[SessionRow, SessionRow], SessionRow]
+
+ROW_COLUMNS = "id, user_ip, created_at, last_activity, messages, revision"
+
+class SessionStore:
+    """Storage backend behind SessionService's in-memory LRU.
+
+    SessionService serializes records to rows on the event loop and hands
+    batches to the store from a background flush, so implementations only
+    deal with plain tuples and may block.
+    """
+
+    name = "base"
+    durable = False
+
+    def load(self, session_id: str) -> Optional[SessionRow]:
+        """Load one session row, or None if the store does not have it"""
+        return None
+
+    def save_many(self, rows: List[SessionRow], merge: Optional[RowMerge] = None) -> List[SessionRow]:
+        """Write a batch of rows and return them as written, with their new revisions.
+
+        A row whose stored revision moved on since it was read is combined
+        with the stored one through merge instead of overwriting it.
+        """
+        return list(rows)
+
+    def delete_many(self, session_ids: Iterable[str]):
+        """Delete a batch of sessions"""
+
+    def load_page(
+        self,
+        after: Optional[Tuple[float, str]],
+        active_since: float,
+        limit: int
+    ) -> List[SessionRow]:
+        """Load up to limit rows ordered by (created_at, id), starting after a key.
+
+        Only sessions active at or after active_since are returned. The key
+        never changes for a session, so paging by it is stable while rows
+        are written and deleted in between.
+        """
+        return []
+
+    def summarize(self) -> Tuple[int, int, float]:
+        """(sessions, messages, summed duration) over every stored session.
+
+        Implementations keep these as running totals updated by each write
+        and delete, so reading them does not scan the sessions.
+        """
+        return 0, 0, 0.0
+
+    def delete_expired(self, before: float) -> int:
+        """Delete sessions whose last activity is older than a wall-clock time"""
+        return 0
+
+    def clear(self):
+        """Delete every stored session"""
+
+    def close(self):
+        """Release any resources held by the store"""
+
+class InMemorySessionStore(SessionStore):
+    """Default store: sessions live only in SessionService's in-memory map"""
+
+    name = "memory"
+
+class SQLiteSessionStore(SessionStore):
+    """Durable store in a SQLite database in WAL mode.
+
+    Sessions survive restarts and are visible to every worker on the host.
+    Every write bumps the row's revision, so a worker can tell when another
+    one changed a session it has cached. Triggers keep store-wide totals in
+    a one-row table inside the same transaction as each write and delete,
+    so every worker reads the same totals without a scan. The connection is opened lazily
+    once per process and is only used from executor threads, which a lock
+    serializes.
+    """
+
+    name = "sqlite"
+    durable = True
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    def load(self, session_id: str) -> Optional[SessionRow]:
+        with self._lock:
+            return self._get_connection().execute(
+                f"SELECT {ROW_COLUMNS} FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+
+    def save_many(self, rows: List[SessionRow], merge: Optional[RowMerge] = None) -> List[SessionRow]:
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                # Take the write lock before reading, so no other worker can
+                # write between the revision check and the write
+                connection.execute("BEGIN IMMEDIATE")
+                written = []
+                for row in rows:
+                    stored = connection.execute(
+                        f"SELECT {ROW_COLUMNS} FROM sessions WHERE id = ?", (row[0],)
+                    ).fetchone()
+                    if stored is not None and stored[5] != row[5] and merge is not None:
+                        row = merge(stored, row)
+                    revision = (stored[5] if stored is not None else row[5]) + 1
+                    written.append(row[:5] + (revision,))
+                # An upsert rather than INSERT OR REPLACE, whose implicit
+                # delete would bypass the totals triggers
+                connection.executemany(
+                    f"INSERT INTO sessions ({ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET user_ip = excluded.user_ip, "
+                    "created_at = excluded.created_at, last_activity = excluded.last_activity, "
+                    "messages = excluded.messages, revision = excluded.revision",
+                    written
+                )
+        return written
+
+    def delete_many(self, session_ids: Iterable[str]):
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.executemany(
+                    "DELETE FROM sessions WHERE id = ?",
+                    [(session_id,) for session_id in session_ids]
+                )
+
+    def load_page(
+        self,
+        after: Optional[Tuple[float, str]],
+        active_since: float,
+        limit: int
+    ) -> List[SessionRow]:
+        created_at, session_id = after if after is not None else (float("-inf"), "")
+        with self._lock:
+            return self._get_connection().execute(
+                f"SELECT {ROW_COLUMNS} FROM sessions "
+                "WHERE (created_at, id) > (?, ?) AND last_activity >= ? "
+                "ORDER BY created_at, id LIMIT ?",
+                (created_at, session_id, active_since, limit)
+            ).fetchall()
+
+    def summarize(self) -> Tuple[int, int, float]:
+        with self._lock:
+            sessions, messages, duration = self._get_connection().execute(
+                "SELECT sessions, messages, duration FROM session_totals WHERE id = 0"
+            ).fetchone()
+        return sessions, messages, duration
+
+    def delete_expired(self, before: float) -> int:
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                return connection.execute(
+                    "DELETE FROM sessions WHERE last_activity < ?",
+                    (before,)
+                ).rowcount
+
+    def clear(self):
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.execute("DELETE FROM sessions")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open the database lazily; connections must not cross fork()"""
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, user_ip TEXT, created_at REAL NOT NULL, "
+            "last_activity REAL NOT NULL, messages TEXT NOT NULL, revision INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {column[1] for column in connection.execute("PRAGMA table_info(sessions)")}
+        if "revision" not in columns:
+            # Databases created before rows were versioned
+            connection.execute("ALTER TABLE sessions ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_activity ON sessions (last_activity)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_created_at ON sessions (created_at, id)"
+        )
+        self._create_totals(connection)
+        connection.commit()
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _create_totals(connection: sqlite3.Connection):
+        """Create the running totals and the triggers that maintain them"""
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_totals ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), sessions INTEGER NOT NULL, "
+            "messages INTEGER NOT NULL, duration REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TRIGGER IF NOT EXISTS session_totals_insert AFTER INSERT ON sessions BEGIN "
+            "UPDATE session_totals SET sessions = sessions + 1, "
+            "messages = messages + json_array_length(NEW.messages), "
+            "duration = duration + NEW.last_activity - NEW.created_at; END"
+        )
+        connection.execute(
+            "CREATE TRIGGER IF NOT EXISTS session_totals_update AFTER UPDATE ON sessions BEGIN "
+            "UPDATE session_totals SET "
+            "messages = messages - json_array_length(OLD.messages) + json_array_length(NEW.messages), "
+            "duration = duration - (OLD.last_activity - OLD.created_at) + (NEW.last_activity - NEW.created_at); END"
+        )
+        connection.execute(
+            "CREATE TRIGGER IF NOT EXISTS session_totals_delete AFTER DELETE ON sessions BEGIN "
+            "UPDATE session_totals SET sessions = sessions - 1, "
+            "messages = messages - json_array_length(OLD.messages), "
+            "duration = duration - (OLD.last_activity - OLD.created_at); END"
+        )
+        if connection.execute("SELECT 1 FROM session_totals").fetchone() is None:
+            # Seeded once from the rows already stored (databases created
+            # before the totals existed), after the triggers exist so no
+            # other worker's write is missed; afterwards only triggers change them
+            connection.execute(
+                "INSERT OR IGNORE INTO session_totals (id, sessions, messages, duration) "
+                "SELECT 0, COUNT(*), TOTAL(json_array_length(messages)), TOTAL(last_activity - created_at) "
+                "FROM sessions"
+            )
+
+def create_session_store() -> SessionStore:
+    """Create the session store selected by SESSION_STORE (memory or sqlite)"""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+
+    if backend == "sqlite":
+        db_path = os.getenv(
+            "SESSION_STORE_DB",
+            os.path.join(os.path.dirname(__file__), "..", "data", "sessions.db")
+        )
+        logger.info(f"✅ Using SQLite session store at {db_path}")
+        return SQLiteSessionStore(db_path)
+
+    if backend != "memory":
+        logger.warning(f"⚠️ Unknown SESSION_STORE '{backend}', keeping sessions in memory")
+    return InMemorySessionStore()
+
+def encode_messages(messages: Iterable[Tuple]) -> str:
+    """Serialize a session's message history (tuples become JSON arrays)"""
+    return json.dumps(list(messages), separators=(",", ":"))
+
+def decode_messages(data: str) -> List[List]:
+    """Deserialize a stored message history"""
+    return json.loads(data)
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from services.metrics import metrics
+from services.tracing import RequestTrace, current_trace
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the work; callers that
+    arrive while it is in flight await the leader's future and receive the
+    same result or exception. A waiter that runs out of time, or whose
+    leader was cancelled, runs the work itself instead.
+
+    The stages the leader's work timed are handed to waiters with the
+    result and added to their traces, so a coalesced request's
+    Server-Timing still shows where the time went (plus its own wait).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "waiter_fallbacks": 0}
+
+    @staticmethod
+    def make_key(message: str, *parts: Hashable) -> Tuple:
+        """Key on the normalized message plus whatever else the answer depends on"""
+        return (" ".join(message.lower().split()),) + parts
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable], timeout: Optional[float] = None):
+        """Run work() once per key among concurrent callers"""
+        future = self.inflight.get(key)
+        if future is not None:
+            return await self._wait(future, work, timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; retrieve the outcome so it is never reported as lost
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.inflight[key] = future
+        self._count("leaders", "leader")
+        trace = current_trace.get()
+        stages_before = dict(trace.stages) if trace is not None else {}
+
+        try:
+            result = await work()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result((result, self._stages_since(trace, stages_before)))
+            return result
+        finally:
+            self.inflight.pop(key, None)
+
+    async def _wait(self, future: asyncio.Future, work: Callable[[], Awaitable], timeout: Optional[float]):
+        self._count("coalesced", "coalesced")
+        start_ns = time.perf_counter_ns()
+        try:
+            result, stages = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Only the leader being cancelled is recoverable; our own cancellation is not
+            if not future.cancelled():
+                raise
+        else:
+            trace = current_trace.get()
+            if trace is not None:
+                for stage, elapsed_ns in stages.items():
+                    trace.add(stage, elapsed_ns)
+                trace.add("coalesced_wait", time.perf_counter_ns() - start_ns)
+                trace.note(f"{self.name}_flight", "coalesced")
+            return result
+
+        self._count("waiter_fallbacks", "waiter_fallback")
+        logger.info(f"Single-flight '{self.name}' waiter running on its own")
+        return await work()
+
+    def _count(self, stat: str, role: str):
+        self.stats[stat] += 1
+        metrics.increment("ai_single_flight_total", flight=self.name, role=role)
+
+    @staticmethod
+    def _stages_since(trace: Optional[RequestTrace], before: Dict[str, int]) -> Dict[str, int]:
+        """Stage time a trace gained since a copy of its stages was taken"""
+        if trace is None:
+            return {}
+        return {
+            stage: elapsed_ns - before.get(stage, 0)
+            for stage, elapsed_ns in trace.stages.items()
+            if elapsed_ns != before.get(stage, 0)
+        }
+
+    def get_stats(self) -> Dict:
+        """Get leader and coalesced-waiter counts"""
+        return {
+            **self.stats,
+            "in_flight": len(self.inflight)
+        }
@@ -0,0 +1,94 @@
+import os
+import re
+import time
+import uuid
+import logging
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Trace ids are echoed into headers and logs, so only accept plain tokens
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+class RequestTrace:
+    """Stage timings of one request, in nanoseconds from perf_counter_ns"""
+
+    __slots__ = ("trace_id", "started_ns", "stages", "notes")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id if trace_id and TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex[:16]
+        self.started_ns = time.perf_counter_ns()
+        self.stages: Dict[str, int] = {}
+        self.notes: Dict[str, str] = {}
+
+    def add(self, stage: str, elapsed_ns: int):
+        """Add time to a stage (a stage entered twice accumulates)"""
+        self.stages[stage] = self.stages.get(stage, 0) + elapsed_ns
+
+    def note(self, name: str, description: str):
+        """Attach a label, such as the engine that answered"""
+        self.notes[name] = description
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter_ns() - self.started_ns) / 1e6
+
+    def server_timing(self) -> str:
+        """Format as a Server-Timing header value, ending with the total so far"""
+        entries = [f"{stage};dur={elapsed_ns / 1e6:.3f}" for stage, elapsed_ns in self.stages.items()]
+        entries.extend(f'{name};desc="{description}"' for name, description in self.notes.items())
+        entries.append(f"total;dur={self.elapsed_ms():.3f}")
+        return ", ".join(entries)
+
+# The trace of the request being handled; None outside a traced request
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+def note_trace(name: str, description: str):
+    """Label the current request's trace, if there is one"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.note(name, description)
+
+class TraceMiddleware:
+    """ASGI middleware giving each request a trace and reporting it back.
+
+    The trace id comes from X-Trace-Id when the caller sends one, so a
+    request can be followed from the Node backend into this service. Stages
+    timed during the request are returned in a Server-Timing header, and
+    requests slower than TRACE_SLOW_MS are logged with their timings.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_ms = float(os.getenv("TRACE_SLOW_MS", "1000"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-trace-id":
+                trace_id = value.decode("latin-1")
+                break
+        trace = RequestTrace(trace_id)
+        token = current_trace.set(trace)
+        server_timing = None
+
+        async def send_with_timing(message):
+            nonlocal server_timing
+            if message["type"] == "http.response.start":
+                server_timing = trace.server_timing()
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing.encode("latin-1")),
+                    (b"x-trace-id", trace.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            if server_timing is not None and trace.elapsed_ms() >= self.slow_ms:
+                logger.warning(f"🐢 Slow request {scope.get('path')} trace={trace.trace_id}: {server_timing}")
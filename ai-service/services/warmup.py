@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Canonical questions mirrored from monitor-chatbot-performance.py
+WARMUP_QUESTIONS = [
+    "hello",
+    "hi there",
+    "hey",
+    "what are your skills?",
+    "tell me about your technologies",
+    "what programming languages do you know?",
+    "react experience",
+    "python skills",
+    "show me your projects",
+    "what have you built?",
+    "tell me about your portfolio",
+    "web applications",
+    "what's your experience?",
+    "tell me about your background",
+    "education details",
+    "how can I contact you?",
+    "what's your email?",
+    "hire you",
+    "artificial intelligence experience",
+    "machine learning projects",
+    "AI integration",
+    "Can you tell me about your full-stack development experience with React and Node.js?",
+    "What kind of AI projects have you worked on and what technologies did you use?",
+    "I'm looking for a developer who can build scalable web applications. Can you help?",
+]
+
+def is_warmup_enabled() -> bool:
+    """Check if the startup warmup stage is enabled"""
+    return os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def load_warmup_questions() -> List[str]:
+    """Load warmup questions, optionally overridden by a JSON list in WARMUP_QUESTIONS_FILE"""
+    questions_file = os.getenv("WARMUP_QUESTIONS_FILE")
+    if questions_file:
+        try:
+            with open(questions_file, 'r') as f:
+                questions = json.load(f)
+            return [q for q in questions if isinstance(q, str) and q.strip()]
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read warmup questions from {questions_file}: {e}")
+    
+    return list(WARMUP_QUESTIONS)
+
+async def run_warmup(context_service, llm_service, questions: Optional[List[str]] = None) -> Dict:
+    """Prime model kernels and fill the retrieval and response caches.
+    
+    Runs a dummy embedding and generation pass, then answers every canonical
+    question once so the matching cache entries exist before the instance is
+    reported ready.
+    """
+    questions = questions if questions is not None else load_warmup_questions()
+    start_time = time.perf_counter()
+    
+    await context_service.warmup()
+    await llm_service.warmup()
+    
+    answered = 0
+    for question in questions:
+        try:
+            context = await context_service.get_relevant_context(question)
+            await llm_service.generate_response(
+                message=question,
+                context=context,
+                session_id="warmup",
+                intent=context_service.classify_intent(question)
+            )
+            answered += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Warmup question failed '{question[:50]}': {e}")
+    
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"✅ Warmup complete: {answered}/{len(questions)} questions in {elapsed:.2f}s")
+    
+    return {
+        "questions": len(questions),
+        "answered": answered,
+        "seconds": round(elapsed, 2)
+    }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the service modules the way the apps do (from services.x import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
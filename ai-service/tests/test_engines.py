@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from services.answer_router import Deadline
+from services.engines import AnswerEngine, EngineRegistry, EngineRequest
+from services.session_service import SessionRecord
+
+class FailingEngine(AnswerEngine):
+    name = "failing"
+
+    async def answer(self, request: EngineRequest):
+        raise RuntimeError("embedding failed")
+
+class FixedEngine(AnswerEngine):
+    name = "fixed"
+
+    async def answer(self, request: EngineRequest):
+        return {"response": "answer", "confidence": 0.5, "sources": []}
+
+def make_registry(*engines: AnswerEngine) -> EngineRegistry:
+    registry = EngineRegistry()
+    for engine in engines:
+        registry.register(engine)
+    registry.cascade = [engine.name for engine in engines]
+    return registry
+
+def make_request() -> EngineRequest:
+    return EngineRequest("hello", SessionRecord("session"), Deadline(10.0))
+
+def test_cascade_falls_through_a_failing_engine():
+    failing = FailingEngine()
+    registry = make_registry(failing, FixedEngine())
+
+    result = asyncio.run(registry.answer(make_request(), EngineRegistry.CASCADE))
+
+    assert result["engine"] == "fixed"
+    assert registry.cascade_stats["errors"] == 1
+    assert failing.stats["failed"] == 1
+
+def test_last_engine_failure_propagates():
+    registry = make_registry(FixedEngine(), FailingEngine())
+    registry.min_confidence = 0.9
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(registry.answer(make_request(), EngineRegistry.CASCADE))
+    assert registry.cascade_stats["fallthroughs"] == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from services.intent_matcher import (
+    COMMON_WORDS,
+    COMMON_WORDS_FINGERPRINT,
+    PORTFOLIO_INTENTS,
+    IntentMatcher,
+    intent_matcher,
+    vocabulary_fingerprint
+)
+
+@pytest.mark.parametrize("typo, keyword", [
+    ("skils", "skill"),
+    ("projcts", "projects"),
+    ("pyhton", "python"),
+    ("experiance", "experience"),
+    ("javscript", "javascript"),
+    ("programing", "programming")
+])
+def test_corrects_misspelled_keywords(typo, keyword):
+    assert intent_matcher.correct(typo) == keyword
+
+@pytest.mark.parametrize("word", ["developer", "treated", "stars", "great", "smart", "coming", "hired"])
+def test_leaves_real_words_alone(word):
+    assert intent_matcher.tokenize(word) == [word]
+
+def test_folds_plurals_of_keywords():
+    assert intent_matcher.tokenize("developers frameworks") == ["developer", "framework"]
+
+def test_short_tokens_are_not_corrected():
+    assert intent_matcher.tokenize("here") == ["here"]
+
+@pytest.mark.parametrize("message, intent", [
+    ("What projects have you developed?", "projects"),
+    ("Are you a web developer?", "web_tech"),
+    ("What are your skils?", "skills"),
+    ("How can I reach you", "contact")
+])
+def test_matches_intent(message, intent):
+    assert intent_matcher.best(message).intent == intent
+
+@pytest.mark.parametrize("message", ["Who treated you?", "Do you like the stars?", "That is great"])
+def test_real_words_do_not_trigger_intents(message):
+    assert intent_matcher.best(message) is None
+
+def test_no_frequent_word_is_a_keyword():
+    # Lexicon entries are never corrected, so one that is also a keyword would be shadowed
+    matcher = IntentMatcher(PORTFOLIO_INTENTS)
+    assert not COMMON_WORDS & set(matcher.vocabulary)
+
+def test_lexicon_was_generated_for_the_current_keywords():
+    assert vocabulary_fingerprint(PORTFOLIO_INTENTS) == COMMON_WORDS_FINGERPRINT, (
+        "Keywords changed: rerun generate_common_words.py to update COMMON_WORDS"
+    )
+
+def test_lexicon_matches_generator():
+    pytest.importorskip("wordfreq")
+    from generate_common_words import find_common_words
+
+    assert find_common_words() == COMMON_WORDS
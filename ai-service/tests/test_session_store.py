@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from services.session_service import merge_rows
+from services.session_store import SQLiteSessionStore, encode_messages
+
+def make_row(session_id, messages, created_at=100.0, last_activity=160.0, revision=0):
+    return (session_id, None, created_at, last_activity, encode_messages(messages), revision)
+
+def scan_totals(db_path):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(
+            "SELECT COUNT(*), TOTAL(json_array_length(messages)), TOTAL(last_activity - created_at) FROM sessions"
+        ).fetchone()
+    finally:
+        connection.close()
+
+def exchange(timestamp):
+    return [timestamp, f"question {timestamp}", "answer", None]
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+def test_totals_follow_writes_and_deletes(db_path):
+    store = SQLiteSessionStore(db_path)
+    assert store.summarize() == (0, 0, 0.0)
+
+    store.save_many([make_row("a", [exchange(1)]), make_row("b", [exchange(2), exchange(3)], last_activity=100.0)])
+    assert store.summarize() == (2, 3, 60.0)
+
+    # Rewriting a session replaces its share rather than adding to it
+    store.save_many([make_row("a", [exchange(1), exchange(4)], last_activity=190.0, revision=1)])
+    assert store.summarize() == (2, 4, 90.0)
+
+    store.delete_many(["b"])
+    assert store.summarize() == (1, 2, 90.0)
+
+    assert store.delete_expired(before=200.0) == 1
+    assert store.summarize() == (0, 0, 0.0)
+
+def test_totals_include_merged_rows(db_path):
+    first, second = SQLiteSessionStore(db_path), SQLiteSessionStore(db_path)
+    (written,) = first.save_many([make_row("a", [exchange(1)])])
+
+    # Both workers read revision 1 and append different exchanges
+    first.save_many([make_row("a", [exchange(1), exchange(2)], revision=written[5])], merge=merge_rows)
+    second.save_many([make_row("a", [exchange(1), exchange(3)], revision=written[5])], merge=merge_rows)
+
+    sessions, messages, duration = second.summarize()
+    assert (sessions, messages, duration) == (1, 3, 60.0)
+    assert scan_totals(db_path) == (sessions, messages, duration)
+
+def test_totals_are_seeded_from_existing_rows(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE sessions (id TEXT PRIMARY KEY, user_ip TEXT, created_at REAL NOT NULL, "
+        "last_activity REAL NOT NULL, messages TEXT NOT NULL)"
+    )
+    connection.execute(
+        "INSERT INTO sessions VALUES ('old', NULL, 0.0, 30.0, ?)", (encode_messages([exchange(1)]),)
+    )
+    connection.commit()
+    connection.close()
+
+    store = SQLiteSessionStore(db_path)
+    assert store.summarize() == (1, 1, 30.0)
+    store.clear()
+    assert store.summarize() == (0, 0, 0.0)
@@ -1,3 +1,4 @@
+const crypto = require('crypto');
 const express = require('express');
 const { body, validationResult } = require('express-validator');
 const axios = require('axios');
@@ -5,6 +6,14 @@ const rateLimit = require('express-rate-limit');
 
 const router = express.Router();
 
+// Time budget for the AI service call; the AI service is told how much of it
+// remains so it can pick answer paths that finish in time
+const AI_SERVICE_TIMEOUT_MS = 8000; // Reduced to 8 second timeout for faster response
+const AI_SERVICE_DEADLINE_MARGIN_MS = 300;
+
+// Trace ids are forwarded to the AI service and echoed in logs, so only plain tokens are accepted
+const TRACE_ID_PATTERN = /^[A-Za-z0-9._-]{1,64}$/;
+
 // Rate limiting for chatbot
 const chatbotLimiter = rateLimit({
   windowMs: 15 * 60 * 1000, // 15 minutes
@@ -43,9 +52,17 @@ router.post('/chat', chatbotLimiter, chatValidation, async (req, res) => {
     const { message, sessionId } = req.body;
     const userIP = req.ip;
 
+    // Reuse the caller's trace id or start one, so this request can be followed into the AI service
+    const clientTraceId = req.get('X-Trace-Id');
+    const traceId = clientTraceId && TRACE_ID_PATTERN.test(clientTraceId)
+      ? clientTraceId
+      : crypto.randomBytes(8).toString('hex');
+    res.set('X-Trace-Id', traceId);
+
     // Log the chat request (for monitoring)
-    console.log(`Chat request from ${userIP}: ${message.substring(0, 50)}...`);
+    console.log(`Chat request ${traceId} from ${userIP}: ${message.substring(0, 50)}...`);
 
+    const aiStart = process.hrtime.bigint();
     try {
       // Call AI service
       const aiResponse = await axios.post(
@@ -56,14 +73,23 @@ router.post('/chat', chatbotLimiter, chatValidation, async (req, res) => {
           userIP
         },
         {
-          timeout: 8000, // Reduced to 8 second timeout for faster response
+          timeout: AI_SERVICE_TIMEOUT_MS,
           headers: {
             'Content-Type': 'application/json',
-            'X-API-Key': process.env.AI_SERVICE_API_KEY || 'dev-key'
+            'X-API-Key': process.env.AI_SERVICE_API_KEY || 'dev-key',
+            'X-Request-Deadline-Ms': String(AI_SERVICE_TIMEOUT_MS - AI_SERVICE_DEADLINE_MARGIN_MS),
+            'X-Trace-Id': traceId
           }
         }
       );
 
+      // The AI service's per-stage Server-Timing, prefixed with the round trip seen from here
+      const aiMs = Number(process.hrtime.bigint() - aiStart) / 1e6;
+      const aiTiming = aiResponse.headers['server-timing'];
+      const serverTiming = `ai-service;dur=${aiMs.toFixed(3)}${aiTiming ? `, ${aiTiming}` : ''}`;
+      res.set('Server-Timing', serverTiming);
+      console.log(`Chat response ${traceId}: ${serverTiming}`);
+
       const { response, sessionId: returnedSessionId, confidence, sources } = aiResponse.data;
 
       res.json({
@@ -77,7 +103,9 @@ router.post('/chat', chatbotLimiter, chatValidation, async (req, res) => {
       });
 
     } catch (aiError) {
-      console.error('AI service error:', aiError.message);
+      const aiMs = Number(process.hrtime.bigint() - aiStart) / 1e6;
+      console.error(`AI service error ${traceId} after ${aiMs.toFixed(0)}ms:`, aiError.message);
+      res.set('Server-Timing', `ai-service;dur=${aiMs.toFixed(3)};desc="failed"`);
 
       // Fallback response when AI service is unavailable
       const fallbackResponse = getFallbackResponse(message);
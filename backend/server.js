@@ -19,6 +19,19 @@ const profileRoutes = require('./routes/profile');
 const app = express();
 const PORT = process.env.PORT || 4000;
 
+// Behind the reverse proxy (Render's load balancer or nginx, one hop in every
+// deployment) req.ip would be the proxy's address, so every client would share
+// the rate limits and the AI service's per-IP session cap. Trusting the proxy
+// makes req.ip the client address it forwards in X-Forwarded-For. TRUST_PROXY
+// takes a hop count, true/false, or comma-separated trusted addresses/subnets;
+// set it to false when clients connect directly.
+const parseTrustProxy = (value) => {
+  if (/^\d+$/.test(value)) return Number(value);
+  if (value === 'true' || value === 'false') return value === 'true';
+  return value;
+};
+app.set('trust proxy', parseTrustProxy(process.env.TRUST_PROXY || '1'));
+
 // Security middleware
 app.use(helmet({
   contentSecurityPolicy: {
@@ -80,7 +93,8 @@ app.use(cors({
   ],
   credentials: true,
   methods: ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'],
-  allowedHeaders: ['Content-Type', 'Authorization', 'X-Requested-With', 'Accept', 'Origin']
+  allowedHeaders: ['Content-Type', 'Authorization', 'X-Requested-With', 'Accept', 'Origin', 'X-Trace-Id'],
+  exposedHeaders: ['Server-Timing', 'X-Trace-Id']
 }));
 app.use(express.json({ limit: '10mb' }));
 app.use(express.urlencoded({ extended: true, limit: '10mb' }));
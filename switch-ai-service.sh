@@ -190,6 +190,28 @@ test_service() {
     fi
 }
 
+# Function to switch the running service's answer engine without a restart
+switch_engine() {
+    policy=$1
+    if [ -z "$policy" ]; then
+        print_error "Usage: $0 engine [instant|template|llm|cascade]"
+        exit 1
+    fi
+    
+    print_status "Switching answer engine to $policy..."
+    
+    response=$(curl -s -X POST http://localhost:8000/engines/policy \
+        -H "Content-Type: application/json" \
+        -H "X-API-Key: ${AI_SERVICE_API_KEY:-dev-key}" \
+        -d "{\"policy\": \"$policy\"}")
+    
+    if echo "$response" | grep -q '"policy"'; then
+        print_success "Answer engine switched to $policy"
+    else
+        print_error "Engine switch failed: $response"
+    fi
+}
+
 # Main menu
 show_menu() {
     echo
@@ -269,8 +291,11 @@ else
         "performance")
             show_performance
             ;;
+        "engine")
+            switch_engine "$2"
+            ;;
         *)
-            echo "Usage: $0 [fast|simple|full|restart|test|status|performance]"
+            echo "Usage: $0 [fast|simple|full|restart|test|status|performance|engine <name>]"
             echo "Or run without arguments for interactive mode"
             exit 1
             ;;